@@ -6,13 +6,19 @@ from pptx.enum.text import PP_ALIGN
 import csv
 from PIL import Image
 import os
+from functools import lru_cache
 from pathlib import Path
 from pptx.enum.text import MSO_AUTO_SIZE,PP_ALIGN
 
+from runtime_config import get_config
+
 prs = Presentation()
 
 
-ASSETS_DIR = Path("/kaggle/working/outputs")
+ASSETS_DIR = get_config().outputs_dir  # default, see RuntimeConfig
+
+# images within 1% of the frame's aspect ratio are placed without cropping
+RATIO_TOLERANCE = 0.01
 
 
 def apply_background(prs, slide, bg_path):
@@ -241,19 +247,26 @@ def add_text(prs,slide, el):
 
 
 
-def add_image(prs,slide, el):
+@lru_cache(maxsize=None)
+def image_size(image_path):
+    # Extracted images are content-addressed and shared between slides,
+    # so only open each file once per run
+    with Image.open(image_path) as img:
+        return img.size
+
+
+def add_image(prs,slide, el, assets_dir=ASSETS_DIR):
     l, t, w, h = n2pt(prs,el["x"], el["y"], el["width"], el["height"])
     
     # Construct full path
-    image_path = ASSETS_DIR / el["source"]
+    image_path = Path(assets_dir) / el["source"]
     
     if not image_path.exists():
         print(f"Image missing: {image_path}")
         return
 
     # 1. Load to get dimensions
-    with Image.open(image_path) as img:
-        img_w, img_h = img.size
+    img_w, img_h = image_size(str(image_path))
 
     frame_ratio = w / h
     img_ratio = img_w / img_h
@@ -268,7 +281,11 @@ def add_image(prs,slide, el):
     # 3. Check Fit Mode (Calculated in previous step)
     fit_mode = el.get("fit", "contain") # Default to contain for safety
 
-    if fit_mode == "cover":
+    if fit_mode == "cover" and abs(frame_ratio - img_ratio) < RATIO_TOLERANCE * frame_ratio:
+        # Already cropped to this box by process_bound_images: just place it
+        pic.left, pic.top, pic.width, pic.height = l, t, w, h
+
+    elif fit_mode == "cover":
         # --- CROP TO FILL ---
         if frame_ratio > img_ratio:
             # Frame is wider: Crop Top/Bottom
@@ -308,8 +325,8 @@ def add_image(prs,slide, el):
 
 
 
-def add_table(prs,slide, el):
-    csv_path = ASSETS_DIR / el["source"]
+def add_table(prs,slide, el, assets_dir=ASSETS_DIR):
+    csv_path = Path(assets_dir) / el["source"]
     
     if not csv_path.exists():
         return
@@ -334,7 +351,9 @@ def add_table(prs,slide, el):
             for paragraph in cell.text_frame.paragraphs:
                 paragraph.font.size = Pt(12)
 
-def assemble_slide(prs, slide_json, bg_path):
+def assemble_slide(prs, slide_json, bg_path, config=None):
+    # element sources are relative to the job's outputs dir
+    assets_dir = (config or get_config()).outputs_dir
     slide = prs.slides.add_slide(prs.slide_layouts[6])
     
 
@@ -347,8 +366,8 @@ def assemble_slide(prs, slide_json, bg_path):
         if el["type"] == "text":
             add_text(prs,slide, el)
         elif el["type"] == "image":
-            add_image(prs,slide, el)
+            add_image(prs,slide, el, assets_dir)
         elif el["type"] == "table":
-            add_table(prs,slide, el)
+            add_table(prs,slide, el, assets_dir)
             
 
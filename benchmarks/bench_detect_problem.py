@@ -0,0 +1,75 @@
+"""
+Micro-benchmark of problem-shape detection on a deck with thousands of
+shapes: detect_problem() against the old check, which pretty-printed every
+shape's XML and ran substring tests on it.
+
+    python benchmarks/bench_detect_problem.py --slides 100 --text-boxes 30
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pptx_extractor import detect_problem, shape_xml_string
+from synthetic_deck import make_deck
+
+
+def legacy_detect(shape):
+    # the check handle_shape used to run on every shape
+    xml_str = shape_xml_string(shape)
+    if "chart" in xml_str.lower() or "smartart" in xml_str.lower():
+        return "chart_or_smartart"
+    if "graphicFrame" in xml_str:
+        if "blip" not in xml_str.lower():
+            return "graphic_frame_no_blip"
+    return None
+
+
+def all_shapes(prs):
+    def walk(shapes):
+        for shape in shapes:
+            yield shape
+            if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+                yield from walk(shape.shapes)
+    return [shape for slide in prs.slides for shape in walk(slide.shapes)]
+
+
+def best_time(fn, shapes, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        flags = [fn(shape) for shape in shapes]
+        best = min(best, time.perf_counter() - start)
+    return best, flags
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--slides", type=int, default=100)
+    parser.add_argument("--text-boxes", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        deck = make_deck(Path(tmp) / "shapes.pptx", slides=args.slides, text_boxes=args.text_boxes,
+                         pictures=1, chart=True)
+        shapes = all_shapes(Presentation(str(deck)))
+
+    legacy, legacy_flags = best_time(legacy_detect, shapes, args.repeat)
+    structural, flags = best_time(detect_problem, shapes, args.repeat)
+    print(f"{len(shapes)} shapes on {args.slides} slides")
+    print(f"substring check: {legacy * 1e3:8.1f} ms  ({legacy / len(shapes) * 1e6:.1f} us/shape)")
+    print(f"detect_problem:  {structural * 1e3:8.1f} ms  ({structural / len(shapes) * 1e6:.1f} us/shape)")
+    print(f"speedup: {legacy / structural:.1f}x")
+    print(f"flagged: substring {sum(f is not None for f in legacy_flags)}, "
+          f"structural {sum(f is not None for f in flags)}")
+
+
+if __name__ == "__main__":
+    main()
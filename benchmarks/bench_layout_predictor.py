@@ -0,0 +1,100 @@
+"""
+Per-deck layout prediction latency: the old per-slide predict_layout (two
+joblib.load calls and a one-row DataFrame per slide) against
+LayoutPredictor.predict_batch (model loaded once, one predict_proba call).
+
+    python benchmarks/bench_layout_predictor.py --model-dir /kaggle/input/weights-for-layout-generator
+    python benchmarks/bench_layout_predictor.py          # trains a stand-in on synthetic data
+
+Needs xgboost and scikit-learn.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from input_for_layoutgenerator import FEATURE_COLUMNS
+from layout_generator.layout_generator import LABEL_ENCODER_FILE, LAYOUT_MODEL_FILE, LayoutPredictor, build_model_input
+from layout_generator.synthetic_data_generator import generate_dataset
+from runtime_config import RuntimeConfig
+
+
+def train_stand_in(model_dir, n_estimators=200):
+    """
+    XGBoost model + label encoder pickled under the names the notebook uses,
+    trained on the synthetic dataset like the real one.
+    """
+    import joblib
+    from sklearn.preprocessing import LabelEncoder
+    from xgboost import XGBClassifier
+
+    df = generate_dataset(samples_per_class=500, seed=0)
+    encoder = LabelEncoder()
+    y = encoder.fit_transform(df["layout_class"])
+    model = XGBClassifier(n_estimators=n_estimators, max_depth=6, learning_rate=0.1, objective="multi:softprob")
+    model.fit(df[FEATURE_COLUMNS], y)
+    joblib.dump(model, model_dir / LAYOUT_MODEL_FILE)
+    joblib.dump(encoder, model_dir / LABEL_ENCODER_FILE)
+
+
+def per_slide_predict(model_dir, features, top_k=2):
+    # predict_layout before LayoutPredictor
+    import joblib
+    X = build_model_input(features, FEATURE_COLUMNS)
+    layout_model = joblib.load(model_dir / LAYOUT_MODEL_FILE)
+    label_encoder = joblib.load(model_dir / LABEL_ENCODER_FILE)
+    probs = layout_model.predict_proba(X)[0]
+    top_indices = np.argsort(probs)[-top_k:][::-1]
+    layouts = label_encoder.inverse_transform(top_indices)
+    return [{"layout": layouts[i], "confidence": float(probs[top_indices[i]])} for i in range(len(layouts))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model-dir", type=Path, default=None)
+    parser.add_argument("--slides", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = args.model_dir
+        if model_dir is None:
+            model_dir = Path(tmp)
+            train_stand_in(model_dir)
+        deck = generate_dataset(samples_per_class=args.slides // 16 + 1, seed=1)[FEATURE_COLUMNS].head(args.slides)
+        rows = deck.to_dict("records")
+        config = RuntimeConfig(layout_model_dir=model_dir)
+
+        before = after_cold = after_warm = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            old = [per_slide_predict(model_dir, row) for row in rows]
+            before = min(before, time.perf_counter() - start)
+
+            predictor = LayoutPredictor(config=config)
+            start = time.perf_counter()
+            new = predictor.predict_batch(deck)
+            after_cold = min(after_cold, time.perf_counter() - start)
+            start = time.perf_counter()
+            predictor.predict_batch(deck)
+            after_warm = min(after_warm, time.perf_counter() - start)
+
+    same = all(
+        [p["layout"] for p in a] == [p["layout"] for p in b]
+        and np.allclose([p["confidence"] for p in a], [p["confidence"] for p in b])
+        for a, b in zip(old, new)
+    )
+    print(f"{args.slides}-slide deck")
+    print(f"per-slide predict_layout:        {before * 1e3:8.1f} ms")
+    print(f"predict_batch, model load incl.: {after_cold * 1e3:8.1f} ms  ({before / after_cold:.0f}x)")
+    print(f"predict_batch, model loaded:     {after_warm * 1e3:8.1f} ms  ({before / after_warm:.0f}x)")
+    print(f"same predictions: {same}")
+
+
+if __name__ == "__main__":
+    main()
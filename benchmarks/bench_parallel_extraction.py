@@ -0,0 +1,64 @@
+"""
+Serial vs parallel extract() wall time on a synthetic large deck.
+
+    python benchmarks/bench_parallel_extraction.py --slides 200 --workers 4
+
+Both runs bypass the extraction cache; the parallel output tree is checked
+to be byte-identical to the serial one.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pptx_extractor import extract
+from synthetic_deck import make_deck
+
+
+def tree_bytes(root):
+    root = Path(root)
+    return {str(p.relative_to(root)): p.read_bytes() for p in sorted(root.rglob("*")) if p.is_file()}
+
+
+def timed_extract(deck, out_dir, workers):
+    start = time.perf_counter()
+    extract(deck, out_dir, workers=workers, use_cache=False)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--slides", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per mode, the best one counts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        deck = make_deck(tmp / "large.pptx", slides=args.slides)
+        print(f"Deck: {args.slides} slides, {deck.stat().st_size / 1e6:.1f} MB")
+
+        results = {}
+        for workers in (1, args.workers):
+            best = float("inf")
+            for run in range(args.repeat):
+                out_dir = tmp / f"out_{workers}_{run}"
+                best = min(best, timed_extract(deck, out_dir, workers))
+            results[workers] = (best, out_dir)
+
+        serial, serial_dir = results[1]
+        parallel, parallel_dir = results[args.workers]
+        identical = tree_bytes(serial_dir) == tree_bytes(parallel_dir)
+        print(f"serial:     {serial:7.2f} s")
+        print(f"workers={args.workers}: {parallel:7.2f} s  ({serial / parallel:.2f}x)")
+        print(f"identical output: {identical}")
+        if not identical:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Time and peak memory of finding the smart_crop box on 4x-upscaled sizes:
+
+- previous: resize the 320x320 U-2-Net mask to the image, threshold, np.where
+- reductions: foreground_bbox() on that full-size mask (resize not timed)
+- raw mask: crop_box() straight from the 320x320 mask, what process_image does
+
+    python benchmarks/bench_smart_crop.py
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from image_processing.smart_crop import crop_box, foreground_bbox
+
+SIZES = [(1024, 768), (2048, 1536), (4096, 3072), (8192, 6144)]
+
+
+def previous_bbox(mask, w, h):
+    full = cv2.resize(mask, (w, h), interpolation=cv2.INTER_LINEAR)
+    _, full = cv2.threshold(full, 128, 255, cv2.THRESH_BINARY)
+    ys, xs = np.where(full == 255)
+    return xs.min(), xs.max(), ys.min(), ys.max()
+
+
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    # cv2 returns numpy arrays, so its outputs are traced along with numpy's
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    mask = np.zeros((320, 320), dtype=np.uint8)
+    cv2.ellipse(mask, (170, 150), (110, 80), 20, 0, 360, 255, -1)
+    mask = cv2.GaussianBlur(mask, (0, 0), 3)
+
+    print(f"{'image':>11} | {'previous':>17} | {'reductions':>17} | {'raw mask':>17}")
+    for w, h in SIZES:
+        full = cv2.resize(mask, (w, h), interpolation=cv2.INTER_LINEAR)
+        cells = []
+        for fn in (lambda: previous_bbox(mask, w, h),
+                   lambda: foreground_bbox(full),
+                   lambda: crop_box(w, h, mask)):
+            seconds, peak = measure(fn, args.repeat)
+            cells.append(f"{seconds * 1e3:7.1f} ms {peak / 1024 ** 2:6.1f} MB")
+        print(f"{w:>5}x{h:<5} | " + " | ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Peak RSS of extract() with and without --stream on a small and a large
+media-heavy deck (incompressible pictures), each run in a fresh process.
+
+    python benchmarks/bench_stream_memory.py --small 10 --large 80 --max-growth-mb 32
+
+Fails (exit 1) if the streaming run on the large deck peaks more than
+--max-growth-mb above the streaming run on the small one, i.e. if streaming
+memory grows with the media in the deck.
+"""
+
+import argparse
+import multiprocessing
+import resource
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from synthetic_deck import make_deck
+
+
+def current_peak_mb():
+    # VmHWM starts over at exec; ru_maxrss keeps the peak of the process that
+    # spawned us (which just built the deck), so it is only the fallback
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _peak_rss(deck, out_dir, stream, result):
+    from pptx_extractor import extract
+    extract(deck, out_dir, stream=stream, use_cache=False)
+    result.put(current_peak_mb())
+
+
+def peak_rss_mb(deck, out_dir, stream):
+    ctx = multiprocessing.get_context("spawn")
+    result = ctx.Queue()
+    proc = ctx.Process(target=_peak_rss, args=(deck, out_dir, stream, result))
+    proc.start()
+    peak = result.get()
+    proc.join()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--small", type=int, default=10, help="slides in the small deck")
+    parser.add_argument("--large", type=int, default=80, help="slides in the large deck")
+    parser.add_argument("--image-size", type=int, default=768, help="picture side in pixels")
+    parser.add_argument("--max-growth-mb", type=float, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        peaks = {}
+        for label, slides in (("small", args.small), ("large", args.large)):
+            deck = make_deck(tmp / f"{label}.pptx", slides=slides, text_boxes=2, pictures=2,
+                             image_size=args.image_size, noise=True, table=False)
+            size_mb = deck.stat().st_size / 1024 ** 2
+            for stream in (False, True):
+                peaks[label, stream] = peak_rss_mb(deck, tmp / f"out_{label}_{stream}", stream)
+            print(f"{label}: {slides} slides, {size_mb:.0f} MB pptx; peak RSS "
+                  f"{peaks[label, False]:.0f} MB default, {peaks[label, True]:.0f} MB --stream")
+
+    growth = peaks["large", True] - peaks["small", True]
+    print(f"--stream growth small -> large: {growth:.0f} MB (bound {args.max_growth_mb:.0f} MB)")
+    if growth > args.max_growth_mb:
+        print("FAIL: streaming peak RSS grows with the deck")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Peak RSS of whole-frame vs tiled 4x upscaling against image size, each run
+in a fresh process.
+
+    python benchmarks/bench_tiled_upscale.py                       # stand-in model
+    python benchmarks/bench_tiled_upscale.py --model realesrgan    # needs torch + weights
+
+The stand-in allocates --bytes-per-pixel of float32 "activations" per input
+pixel and resizes with cv2, so the benchmark runs anywhere; Real-ESRGAN's
+real figure is about tiling.BYTES_PER_INPUT_PIXEL (6 KB).
+"""
+
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+SIZES = [512, 1024, 1536, 2048]
+
+
+class StandInModel:
+    """
+    enhance() with RealESRGANer's interface whose memory grows with the input.
+    """
+    scale = 4
+
+    def __init__(self, bytes_per_pixel):
+        self.bytes_per_pixel = bytes_per_pixel
+
+    def enhance(self, img, outscale=4):
+        h, w = img.shape[:2]
+        activations = np.ones((h, w, self.bytes_per_pixel // 4), dtype=np.float32)
+        out = cv2.resize(img, (int(round(w * outscale)), int(round(h * outscale))), interpolation=cv2.INTER_CUBIC)
+        del activations
+        return out, None
+
+
+def current_peak_mb():
+    # VmHWM starts over at exec, ru_maxrss would include the parent's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(size, tile, workers, model_name, bytes_per_pixel, result):
+    from image_processing.upscale import RealESRGANUpscaler
+
+    model = StandInModel(bytes_per_pixel) if model_name == "stand-in" else None
+    upscaler = RealESRGANUpscaler(model=model, tile=tile, tile_workers=workers)
+    img = np.random.default_rng(0).integers(0, 256, (size, size, 3), dtype=np.uint8)
+    upscaler.model  # load outside the timed part
+    start = time.perf_counter()
+    out = upscaler.upscale(img)
+    result.put((time.perf_counter() - start, current_peak_mb(), out.shape))
+
+
+def measure(size, tile, workers, model_name, bytes_per_pixel):
+    ctx = multiprocessing.get_context("spawn")
+    result = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(size, tile, workers, model_name, bytes_per_pixel, result))
+    proc.start()
+    seconds, peak, shape = result.get()
+    proc.join()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", choices=["stand-in", "realesrgan"], default="stand-in")
+    parser.add_argument("--bytes-per-pixel", type=int, default=256, help="stand-in activation bytes per input pixel")
+    parser.add_argument("--tile", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    args = parser.parse_args()
+
+    modes = [("whole frame", None, 1), (f"tile {args.tile}", args.tile, 1),
+             (f"tile {args.tile} x{args.workers} workers", args.tile, args.workers)]
+    print(f"{'input':>11} | " + " | ".join(f"{name:>26}" for name, _, _ in modes))
+    for size in args.sizes:
+        cells = []
+        for _, tile, workers in modes:
+            seconds, peak = measure(size, tile, workers, args.model, args.bytes_per_pixel)
+            cells.append(f"{peak:8.0f} MB {seconds:9.2f} s")
+        print(f"{size:>5}x{size:<5} | " + " | ".join(f"{c:>26}" for c in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Synthetic decks for the extraction benchmarks.
+
+make_deck() writes a pptx with the given number of slides, each holding a
+title, text boxes, pictures and optionally a table and a chart, so the
+extractor sees the same kinds of shapes as in a real training deck.
+"""
+
+import io
+
+import numpy as np
+from PIL import Image
+from pptx import Presentation
+from pptx.chart.data import CategoryChartData
+from pptx.enum.chart import XL_CHART_TYPE
+from pptx.util import Inches, Pt
+
+BLANK_LAYOUT = 6
+
+
+def picture_bytes(size, seed, noise=False):
+    """
+    PNG of size x size pixels. noise=True makes it incompressible, so the
+    pptx (and the media python-pptx would load) grows with size.
+    """
+    rng = np.random.default_rng(seed)
+    if noise:
+        pixels = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+    else:
+        pixels = np.empty((size, size, 3), dtype=np.uint8)
+        pixels[:] = rng.integers(0, 256, 3, dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def make_deck(path, slides=200, text_boxes=8, pictures=2, image_size=64,
+              unique_images=True, noise=False, table=True, chart=False, seed=0):
+    """
+    Writes the deck to path and returns it. unique_images=False reuses one
+    picture everywhere (the dedup case); otherwise every picture differs.
+    """
+    prs = Presentation()
+    prs.slide_width = Inches(13.333)
+    prs.slide_height = Inches(7.5)
+    shared = picture_bytes(image_size, seed, noise)
+
+    for si in range(slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[BLANK_LAYOUT])
+        title = slide.shapes.add_textbox(Inches(0.5), Inches(0.3), Inches(12), Inches(0.8))
+        title.text_frame.text = f"Slide {si + 1}: quarterly results and outlook"
+        title.text_frame.paragraphs[0].runs[0].font.size = Pt(32)
+
+        for b in range(text_boxes):
+            box = slide.shapes.add_textbox(Inches(0.5), Inches(1.2 + 0.6 * b), Inches(6), Inches(0.5))
+            frame = box.text_frame
+            frame.text = f"Point {b + 1}: revenue grew {b * 3 + si % 7}% year over year"
+            frame.add_paragraph().text = "Supporting detail for the point above"
+
+        for p in range(pictures):
+            blob = picture_bytes(image_size, seed + 1 + si * pictures + p, noise) if unique_images else shared
+            slide.shapes.add_picture(io.BytesIO(blob), Inches(7 + 3 * p), Inches(1.5), Inches(2.8), Inches(2.8))
+
+        if table:
+            rows, cols = 4, 3
+            shape = slide.shapes.add_table(rows, cols, Inches(7), Inches(4.6), Inches(5.5), Inches(2))
+            for r in range(rows):
+                for c in range(cols):
+                    shape.table.cell(r, c).text = f"r{r}c{c}"
+
+        if chart:
+            data = CategoryChartData()
+            data.categories = ["Q1", "Q2", "Q3", "Q4"]
+            data.add_series("Revenue", (si % 5 + 1, 2, 3, 4))
+            slide.shapes.add_chart(XL_CHART_TYPE.COLUMN_CLUSTERED, Inches(0.5), Inches(6), Inches(4), Inches(1.4), data)
+
+        slide.notes_slide.notes_text_frame.text = f"Speaker notes for slide {si + 1}"
+
+    prs.save(str(path))
+    return path
@@ -1,11 +1,13 @@
 from pathlib import Path
 import json
 
+from deck_loader import has_manifest, iter_slides, write_manifest
+
 def resolve_image_path(raw_image_path, base_dir):
     """
     Converts raw image path to enhanced image path if available.
 
-    raw_image_path: e.g. "images/slide01_shape2_img.png"
+    raw_image_path: e.g. "images/<sha1>.png"
     base_dir: Path to ingestion output root
     """
 
@@ -22,17 +24,27 @@ def resolve_image_path(raw_image_path, base_dir):
     # Fallback to raw
     return raw_image_path
   
-def update_slide_metadata_images(slide_json_path, base_dir):
+def update_shape_images(data, base_dir, resolved):
+    """
+    resolved: dict shared across slides. Images are content-addressed,
+    so the same raw path shows up on many slides and is only resolved once.
+    """
+    for shape in data["shapes"]:
+        if shape.get("has_image") and shape.get("image_path"):
+            raw = shape["image_path"]
+            if raw not in resolved:
+                resolved[raw] = resolve_image_path(raw, base_dir)
+            shape["image_path"] = resolved[raw]
+    return data
+
+def update_slide_metadata_images(slide_json_path, base_dir, resolved=None):
     slide_json_path = Path(slide_json_path)
+    if resolved is None:
+        resolved = {}
 
     data = json.loads(slide_json_path.read_text())
 
-    for shape in data["shapes"]:
-        if shape.get("has_image") and shape.get("image_path"):
-            shape["image_path"] = resolve_image_path(
-                shape["image_path"],
-                base_dir
-            )
+    update_shape_images(data, base_dir, resolved)
 
     slide_json_path.write_text(
         json.dumps(data, indent=2),
@@ -41,10 +53,19 @@ def update_slide_metadata_images(slide_json_path, base_dir):
 
 def update_all_slides(base_dir):
     base_dir = Path(base_dir)
+    resolved = {}
+
+    if has_manifest(base_dir):
+        write_manifest(
+            base_dir,
+            (update_shape_images(s, base_dir, resolved) for s in iter_slides(base_dir))
+        )
+        print(" Deck manifest updated with enhanced image paths.")
+        return
 
     for slide_dir in base_dir.glob("slide_*"):
         for slide_json in slide_dir.glob("*_metadata.json"):
-            update_slide_metadata_images(slide_json, base_dir)
+            update_slide_metadata_images(slide_json, base_dir, resolved)
 
     print(" All slide metadata updated with enhanced image paths.")
   
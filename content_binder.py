@@ -1,5 +1,8 @@
 
 import math
+
+from layout_generator.template_registry import thaw
+
 def split_content(slide_meta):
     texts = []
     images = []
@@ -26,8 +29,10 @@ def bind_content(layout, texts, images, tables):
         else:
             all_paragraphs.append(text_block)
             
-    text_slots = [i for i, el in enumerate(layout["elements"]) if el["type"] == "text"]
-    num_slots = len(text_slots)
+    if hasattr(layout, "slot_counts"):
+        num_slots = layout.slot_counts["text"]
+    else:
+        num_slots = sum(1 for el in layout["elements"] if el["type"] == "text")
     
     # Create buckets for each text slot
     slot_buckets = [[] for _ in range(num_slots)]
@@ -42,7 +47,8 @@ def bind_content(layout, texts, images, tables):
     text_count = 0
 
     for el in layout["elements"]:
-        new_el = el.copy()
+        # templates from the registry are immutable: bind into plain dicts
+        new_el = thaw(el)
         if el["type"] == "text":
             new_el["content"] = slot_buckets[text_count]
 
@@ -1,8 +1,8 @@
 import os
 import sys
 import json
-import glob
 import csv
+from deck_loader import load_slides
 from google import genai
 from google.genai import types
 #from dotenv import load_dotenv
@@ -28,24 +28,18 @@ if not api_key:
 #  to get the data from the extracted json and give it to llm for refinement
 def load_and_clean_slides(ingestion_output_dir):
     """
-    Reads extracted slide JSON + table CSV.
+    Reads extracted slide JSON (or the deck manifest) + table CSV.
     Returns structured slide-wise content for LLM.
     """
     slides = []
 
-    pattern = os.path.join(ingestion_output_dir, "slide_*", "*_metadata.json")
-    files = sorted(glob.glob(pattern))
+    slide_records = load_slides(ingestion_output_dir)
 
-    if not files:
+    if not slide_records:
         print(" No slide metadata found.")
         return None
 
-    for file_path in files:
-        slide_dir = os.path.dirname(file_path)
-
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
+    for data in slide_records:
         slide_num = data.get("slide_num")
         blocks = []
 
@@ -64,8 +58,8 @@ def load_and_clean_slides(ingestion_output_dir):
             elif shape.get("has_table"):
                 csv_rel = shape.get("table_csv")
                 if csv_rel:
-                    csv_name = os.path.basename(csv_rel)
-                    csv_path = os.path.join(slide_dir, csv_name)
+                    # table_csv is relative to the ingestion root
+                    csv_path = os.path.join(ingestion_output_dir, csv_rel)
 
                     if os.path.exists(csv_path):
                         rows = []
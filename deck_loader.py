@@ -0,0 +1,110 @@
+"""
+deck_loader.py
+Shared reader for pptx_extractor output, used by the feature extractor,
+the content refiner and the binder loop.
+
+Prefers the single-file deck manifest (deck_manifest.jsonl, one slide record
+per line) when extract() wrote one, and falls back to the per-slide
+slide_XX/slide_XX_metadata.json files otherwise.
+"""
+
+import json
+import os
+from pathlib import Path
+
+MANIFEST_NAME = "deck_manifest.jsonl"
+
+
+def manifest_line(slide_meta):
+    return json.dumps(slide_meta, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def has_manifest(ingestion_dir):
+    return (Path(ingestion_dir) / MANIFEST_NAME).exists()
+
+
+def slide_number(slide_dir):
+    """
+    12 for slide_12/, None for anything that is not a slide directory name.
+    """
+    name = Path(slide_dir).name
+    num = name[len("slide_"):]
+    return int(num) if name.startswith("slide_") and num.isdigit() else None
+
+
+def slide_dirs(ingestion_dir):
+    """
+    slide_XX directories sorted by slide number, so slide_100 comes after
+    slide_99 rather than after slide_10.
+    """
+    dirs = [p for p in Path(ingestion_dir).glob("slide_*") if p.is_dir() and slide_number(p) is not None]
+    return sorted(dirs, key=slide_number)
+
+
+def iter_slides(ingestion_dir):
+    """
+    Yields slide metadata dicts in slide order.
+    With a manifest this is one sequential read instead of a glob + parse per slide.
+    """
+    ingestion_dir = Path(ingestion_dir)
+    manifest_path = ingestion_dir / MANIFEST_NAME
+
+    if manifest_path.exists():
+        with manifest_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    for slide_dir in slide_dirs(ingestion_dir):
+        meta_path = slide_dir / f"{slide_dir.name}_metadata.json"
+        if not meta_path.exists():
+            continue
+        with open(meta_path, "r", encoding="utf-8") as f:
+            yield json.load(f)
+
+
+def load_slides(ingestion_dir):
+    return list(iter_slides(ingestion_dir))
+
+
+def load_slide(ingestion_dir, slide_num):
+    """
+    One slide record, from whichever layout extract() wrote (the manifest
+    first, like iter_slides); None if the deck has no such slide. Reads the
+    manifest up to the slide, so use iter_slides() / load_slides() to go over
+    a whole deck.
+    """
+    ingestion_dir = Path(ingestion_dir)
+    manifest_path = ingestion_dir / MANIFEST_NAME
+    if manifest_path.exists():
+        with manifest_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    slide_meta = json.loads(line)
+                    if slide_meta.get("slide_num") == slide_num:
+                        return slide_meta
+        return None
+
+    meta_path = slide_dir_for(ingestion_dir, slide_num) / f"slide_{slide_num:02d}_metadata.json"
+    if not meta_path.exists():
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def slide_dir_for(ingestion_dir, slide_num):
+    return Path(ingestion_dir) / f"slide_{slide_num:02d}"
+
+
+def write_manifest(ingestion_dir, slides):
+    """
+    Rewrites the deck manifest from an iterable of slide records
+    (e.g. after changing_path swapped in enhanced image paths).
+    """
+    manifest_path = Path(ingestion_dir) / MANIFEST_NAME
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        for slide_meta in slides:
+            f.write(manifest_line(slide_meta))
+    os.replace(tmp_path, manifest_path)
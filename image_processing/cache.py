@@ -0,0 +1,118 @@
+"""
+Cross-run cache for enhanced images (process_image outputs).
+
+Stock photos and logos come back deck after deck; an entry is keyed by the
+sha256 of the source image plus every parameter that changes the output
+(model, scale policy inputs, target size and ratio), so a warm cache makes
+Real-ESRGAN + U-2-Net + cropping a file copy. The cache is trimmed to
+max_bytes, least recently used first.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from runtime_config import get_config
+
+CACHE_DIR = get_config().enhanced_cache_dir  # default, see RuntimeConfig
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+# bump when the enhancement steps change so stale entries stop matching
+ENHANCE_VERSION = 1
+
+
+class EnhancedImageCache:
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+    def key(self, source_path, params):
+        h = hashlib.sha256()
+        with open(source_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        h.update(json.dumps({"version": ENHANCE_VERSION, **params}, sort_keys=True).encode())
+        return h.hexdigest()
+
+    def _entry(self, key, suffix):
+        return self.cache_dir / f"{key}{suffix}"
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, key, dest_path):
+        """
+        Materializes the cached output at dest_path. Returns True on a hit.
+        An entry evicted by another job while it is being read is a miss.
+        """
+        dest_path = Path(dest_path)
+        entry = self._entry(key, dest_path.suffix)
+        if not entry.exists():
+            self._count("misses")
+            return False
+
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        dest_path.unlink(missing_ok=True)
+        try:
+            os.utime(entry)
+            try:
+                os.link(entry, dest_path)
+            except OSError:
+                # no hardlinks here; a vanished entry fails the copy too
+                shutil.copy2(entry, dest_path)
+        except FileNotFoundError:
+            dest_path.unlink(missing_ok=True)
+            self._count("misses")
+            return False
+        self._count("hits")
+        return True
+
+    def put(self, key, output_path):
+        output_path = Path(output_path)
+        entry = self._entry(key, output_path.suffix)
+        # copy beside the entry then rename, other jobs may share the cache
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", suffix=output_path.suffix, dir=self.cache_dir)
+        os.close(fd)
+        shutil.copy2(output_path, tmp)
+        os.replace(tmp, entry)
+        self.evict()
+
+    def evict(self):
+        stats = {}
+        for p in self.cache_dir.iterdir():
+            if p.name.startswith(".") or not p.is_file():
+                continue
+            try:
+                stats[p] = p.stat()
+            except FileNotFoundError:
+                continue  # evicted by another job meanwhile
+        entries = list(stats)
+        total = sum(s.st_size for s in stats.values())
+        for entry in sorted(entries, key=lambda p: stats[p].st_mtime):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= stats[entry].st_size
+            self._count("evictions")
+
+
+_CACHES = {}
+
+
+def get_cache(config=None):
+    """
+    Process-wide cache instance per cache dir, so its counters cover the
+    whole run.
+    """
+    cache_dir = (config or get_config()).enhanced_cache_dir
+    if cache_dir not in _CACHES:
+        _CACHES[cache_dir] = EnhancedImageCache(cache_dir)
+    return _CACHES[cache_dir]
@@ -1,43 +1,205 @@
-import subprocess
 import sys
+import threading
+import time
+from collections import deque
 from pathlib import Path
-import shutil
 
-U2NET_DIR = Path("/kaggle/working/U-2-Net")
-INPUT_DIR = U2NET_DIR / "test_data" / "test_images"
-RESULTS_DIR = U2NET_DIR / "test_data" / "u2net_results"
+import cv2
+import numpy as np
 
+from runtime_config import get_config
 
-def generate_mask(image_path, output_dir):
-    image_path = Path(image_path)
-    output_dir = Path(output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
+U2NET_DIR = get_config().u2net_dir  # default, see RuntimeConfig
+INPUT_SIZE = 320  # u2net_test.py rescales to 320x320
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+TIMINGS_KEPT = 1000  # most recent batches kept in U2NetMasker.timings
 
-#U-2-NET doesn't allow mdoel 2 run from external path so we have to first copy our input in their test folder and then copy the results from their folder
-    for f in INPUT_DIR.glob("*"):
-        f.unlink()
 
-    
-    temp_image = INPUT_DIR / image_path.name
-    shutil.copy(image_path, temp_image)
+def u2net_weights(u2net_dir):
+    return Path(u2net_dir) / "saved_models" / "u2net" / "u2net.pth"
 
-    subprocess.run(
-        [sys.executable, "u2net_test.py"],
-        cwd=U2NET_DIR,
-        check=True
-    )
 
-    
-    expected_mask = RESULTS_DIR / f"{image_path.stem}.png"
+U2NET_WEIGHTS = u2net_weights(U2NET_DIR)
 
-    if not expected_mask.exists():
-        raise RuntimeError(
-            f"Expected U-2-Net mask not found: {expected_mask}"
-        )
 
-    final_mask = output_dir / expected_mask.name
-    shutil.copy(expected_mask, final_mask)
+def load_u2net(weights_path=None, device=None, u2net_dir=None):
+    """
+    Loads U2NET the way u2net_test.py does, once.
+    """
+    import torch
 
-    return final_mask
+    u2net_dir = u2net_dir or get_config().u2net_dir
+    weights_path = weights_path or u2net_weights(u2net_dir)
 
+    # U-2-Net is a cloned repo, not a package: its model/ dir has to be importable
+    if str(u2net_dir) not in sys.path:
+        sys.path.insert(0, str(u2net_dir))
+    from model import U2NET
 
+    if device is None:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+    net = U2NET(3, 1)
+    net.load_state_dict(torch.load(str(weights_path), map_location=device))
+    net.to(device)
+    net.eval()
+    return net, device
+
+
+def preprocess(img_bgr):
+    """
+    Same normalisation as u2net_test.py (RescaleT(320) + ToTensorLab(flag=0)),
+    returns a CHW float32 array.
+    """
+    if img_bgr.ndim == 2:
+        img_bgr = cv2.cvtColor(img_bgr, cv2.COLOR_GRAY2BGR)
+    elif img_bgr.shape[2] == 4:
+        img_bgr = cv2.cvtColor(img_bgr, cv2.COLOR_BGRA2BGR)
+    img = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB).astype(np.float32)
+    img = cv2.resize(img, (INPUT_SIZE, INPUT_SIZE), interpolation=cv2.INTER_LINEAR)
+    img /= max(float(img.max()), 1e-6)
+    img = (img - IMAGENET_MEAN) / IMAGENET_STD
+    return img.transpose(2, 0, 1)
+
+
+class U2NetMasker:
+    """
+    Keeps U-2-Net loaded and masks images in batches straight from their
+    source paths. There is no shared scratch directory, so several workers
+    can mask at the same time.
+
+    Every predict_masks() / mask_batch() batch appends an entry to
+    `timings` (the last TIMINGS_KEPT are kept) with its size and seconds plus
+    per-image seconds (pre/post-processing, plus load/write for mask_batch,
+    and an equal share of the batch's forward pass). Entries are appended
+    under a lock, so threads sharing the masker do not lose each other's.
+    """
+
+    def __init__(self, net=None, device="cpu", batch_size=8, weights_path=None, config=None):
+        self._net = net
+        self.device = device
+        self.batch_size = batch_size
+        self.u2net_dir = (config or get_config()).u2net_dir
+        self.weights_path = weights_path or u2net_weights(self.u2net_dir)
+        self.timings = deque(maxlen=TIMINGS_KEPT)
+        self._lock = threading.Lock()
+        self._timings_lock = threading.Lock()
+
+    @property
+    def net(self):
+        if self._net is None:
+            self._net, self.device = load_u2net(self.weights_path, u2net_dir=self.u2net_dir)
+        return self._net
+
+    def _predict(self, batch):
+        import torch
+
+        with self._lock, torch.no_grad():
+            # loading the net on first use sets self.device, so read it first
+            net = self.net
+            inputs = torch.from_numpy(np.stack(batch)).to(self.device)
+            d1 = net(inputs)[0]
+            pred = d1[:, 0, :, :]
+            # normPRED from u2net_test.py, per image
+            flat = pred.reshape(pred.shape[0], -1)
+            lo = flat.min(dim=1).values.view(-1, 1, 1)
+            hi = flat.max(dim=1).values.view(-1, 1, 1)
+            pred = (pred - lo) / (hi - lo).clamp_min(1e-8)
+            return pred.cpu().numpy()
+
+    def _record(self, names, per_image, seconds):
+        with self._timings_lock:
+            self.timings.append({
+                "size": len(names),
+                "seconds": seconds,
+                "images": [{"image": name, "seconds": t} for name, t in zip(names, per_image)],
+            })
+
+    def predict_masks(self, images, names=None):
+        """
+        Masks for in-memory BGR arrays, in input order, at U-2-Net's 320x320
+        output resolution (uint8). smart_crop maps their bounding box back to
+        the full image, so no full-size mask is ever materialized.
+        names: labels for the timing entries (e.g. source paths).
+        """
+        names = [str(n) for n in names] if names is not None else [f"image {i}" for i in range(len(images))]
+        masks = []
+        for start in range(0, len(images), self.batch_size):
+            chunk = images[start:start + self.batch_size]
+            batch_start = time.perf_counter()
+
+            tensors, per_image = [], []
+            for img in chunk:
+                t0 = time.perf_counter()
+                tensors.append(preprocess(img))
+                per_image.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            preds = self._predict(tensors)
+            forward_share = (time.perf_counter() - t0) / len(chunk)
+
+            for i, pred in enumerate(preds):
+                t0 = time.perf_counter()
+                masks.append((pred * 255).astype(np.uint8))
+                per_image[i] += time.perf_counter() - t0 + forward_share
+
+            self._record(names[start:start + self.batch_size], per_image, time.perf_counter() - batch_start)
+        return masks
+
+    def mask_batch(self, image_paths, output_dir):
+        """
+        Masks every image and writes output_dir/<stem>.png (same name
+        u2net_test.py produced). Returns the mask paths in input order.
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        image_paths = [Path(p) for p in image_paths]
+        masks = []
+
+        for start in range(0, len(image_paths), self.batch_size):
+            chunk = image_paths[start:start + self.batch_size]
+            batch_start = time.perf_counter()
+
+            tensors, sizes, per_image = [], [], []
+            for path in chunk:
+                t0 = time.perf_counter()
+                img = cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+                if img is None:
+                    raise RuntimeError(f"Could not read image: {path}")
+                tensors.append(preprocess(img))
+                sizes.append((img.shape[1], img.shape[0]))
+                per_image.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            preds = self._predict(tensors)
+            forward_share = (time.perf_counter() - t0) / len(chunk)
+
+            for i, (path, pred, (w, h)) in enumerate(zip(chunk, preds, sizes)):
+                t0 = time.perf_counter()
+                mask = cv2.resize((pred * 255).astype(np.uint8), (w, h), interpolation=cv2.INTER_LINEAR)
+                out_path = output_dir / f"{path.stem}.png"
+                if not cv2.imwrite(str(out_path), mask):
+                    raise RuntimeError(f"Could not write mask: {out_path}")
+                masks.append(out_path)
+                per_image[i] += time.perf_counter() - t0 + forward_share
+
+            self._record([str(p) for p in chunk], per_image, time.perf_counter() - batch_start)
+
+        return masks
+
+_MASKERS = {}
+
+
+def get_masker(config=None):
+    """
+    Process-wide masker per U-2-Net dir, so U-2-Net is loaded once per worker.
+    """
+    config = config or get_config()
+    if config.u2net_dir not in _MASKERS:
+        _MASKERS[config.u2net_dir] = U2NetMasker(config=config)
+    return _MASKERS[config.u2net_dir]
+
+
+def generate_mask(image_path, output_dir, masker=None, config=None):
+    masker = masker or get_masker(config)
+    return masker.mask_batch([image_path], output_dir)[0]
@@ -0,0 +1,203 @@
+"""
+Pipelined image enhancement: upscale -> mask -> crop/encode run as separate
+stages connected by bounded queues (images travel between stages as arrays,
+so queue_size also bounds memory), so image N+1 is upscaling while image N
+is masked and image N-1 is cropped and written. Throughput tends towards the
+slowest stage instead of the sum of all three.
+
+Stages are threads: torch, OpenCV and file IO release the GIL for the heavy
+parts. Upscale workers share one resident model whose enhance() calls are
+serialized, so extra upscale workers only overlap reading and resizing with
+it; to spread one large image over several cores, give the upscaler tiles
+and tile_workers (see RealESRGANUpscaler).
+"""
+
+import queue
+import threading
+import time
+from pathlib import Path
+
+from runtime_config import get_config
+from image_processing.cache import get_cache
+from image_processing.mask import get_masker
+from image_processing.policy import FULL_SLIDE_BOX, RENDER_DPI, target_pixels
+from image_processing.process_image import read_image, upscale_for_target, crop_to_target, final_path, cache_params, write_image
+from image_processing.upscale import get_upscaler
+
+_DONE = object()
+
+
+def _get_batch(in_q, max_items):
+    """
+    Blocks for one item, then takes whatever else is already queued (up to
+    max_items) so the mask stage can run U-2-Net on a batch.
+    """
+    items = [in_q.get()]
+    while items[-1] is not _DONE and len(items) < max_items:
+        try:
+            items.append(in_q.get_nowait())
+        except queue.Empty:
+            break
+    if items[-1] is _DONE:
+        items.pop()
+        in_q.put(_DONE)  # let the other workers of this stage see it too
+        return items, True
+    return items, False
+
+
+def _run_stage(name, fn, in_q, out_q, workers, batch_size, stage_seconds):
+    """
+    Starts `workers` threads applying fn(list of items) -> list of items.
+    Items are (index, source_path, payload, error); failed items skip fn and
+    are passed through so the order bookkeeping stays simple.
+    Returns a thread that forwards _DONE downstream once all workers exit.
+    """
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            items, done = _get_batch(in_q, batch_size)
+            todo = [it for it in items if it[3] is None]
+            results = [it for it in items if it[3] is not None]
+            if todo:
+                start = time.perf_counter()
+                try:
+                    results.extend(fn(todo))
+                except Exception as e:
+                    results.extend((idx, src, None, e) for idx, src, _, _ in todo)
+                with lock:
+                    stage_seconds[name] += time.perf_counter() - start
+            for it in results:
+                out_q.put(it)
+            if done:
+                return
+
+    threads = [threading.Thread(target=work, name=f"{name}-{i}", daemon=True) for i in range(workers)]
+    for t in threads:
+        t.start()
+
+    def close():
+        for t in threads:
+            t.join()
+        out_q.put(_DONE)
+
+    closer = threading.Thread(target=close, name=f"{name}-close", daemon=True)
+    closer.start()
+    return closer
+
+
+def enhance_images(
+    image_paths,
+    upscale_workers=1,
+    mask_workers=1,
+    crop_workers=2,
+    queue_size=4,
+    upscaler=None,
+    masker=None,
+    target_boxes=None,
+    dpi=RENDER_DPI,
+    cache=None,
+    use_cache=True,
+    config=None
+):
+    """
+    Runs the process_image() steps over many images as a pipeline.
+    target_boxes: optional (width, height) layout box per image, see
+    process_image(); defaults to the full slide.
+    Images found in the enhanced-image cache skip all three stages.
+    config: RuntimeConfig for models, cache and output dirs (process default
+    when not given).
+    Returns (final paths in input order, None where an image failed;
+    stats dict with per-stage busy seconds, wall time, cache hits/misses
+    for this run and errors).
+    """
+    config = config or get_config()
+    upscaler = upscaler or get_upscaler(config)
+    masker = masker or get_masker(config)
+    cache = (cache or get_cache(config)) if use_cache else None
+    cache_before = dict(cache.stats) if cache is not None else None
+    config.final_dir.mkdir(parents=True, exist_ok=True)
+
+    image_paths = [Path(p) for p in image_paths]
+    if target_boxes is None:
+        target_boxes = [FULL_SLIDE_BOX] * len(image_paths)
+    targets = [target_pixels(box, dpi) for box in target_boxes]
+    keys = [None] * len(image_paths)
+
+    def upscale(items):
+        return [
+            (idx, src, upscale_for_target(read_image(src), *targets[idx], upscaler=upscaler), None)
+            for idx, src, _, _ in items
+        ]
+
+    def mask(items):
+        masks = masker.predict_masks([up for _, _, up, _ in items], [src for _, src, _, _ in items])
+        return [(idx, src, (up, m), None) for (idx, src, up, _), m in zip(items, masks)]
+
+    def crop(items):
+        out = []
+        for idx, src, (up, m), _ in items:
+            final_img = crop_to_target(up, m, *targets[idx])
+            final_out = final_path(src, target_boxes[idx], dpi, config)
+            write_image(final_out, final_img)
+            if keys[idx] is not None:
+                cache.put(keys[idx], final_out)
+            out.append((idx, src, final_out, None))
+        return out
+
+    start = time.perf_counter()
+    stage_seconds = {"upscale": 0.0, "mask": 0.0, "crop": 0.0}
+    q_in, q_up, q_mask, q_out = (queue.Queue(maxsize=queue_size) for _ in range(4))
+
+    closers = [
+        _run_stage("upscale", upscale, q_in, q_up, upscale_workers, 1, stage_seconds),
+        _run_stage("mask", mask, q_up, q_mask, mask_workers, masker.batch_size, stage_seconds),
+        _run_stage("crop", crop, q_mask, q_out, crop_workers, 1, stage_seconds),
+    ]
+
+    def feed():
+        for idx, path in enumerate(image_paths):
+            if cache is not None:
+                try:
+                    keys[idx] = cache.key(path, cache_params(*targets[idx]))
+                    final_out = final_path(path, target_boxes[idx], dpi, config)
+                    if cache.get(keys[idx], final_out):
+                        q_out.put((idx, path, final_out, None))
+                        continue
+                except OSError as e:
+                    q_out.put((idx, path, None, e))
+                    continue
+            q_in.put((idx, path, None, None))
+        q_in.put(_DONE)
+
+    threading.Thread(target=feed, name="feed", daemon=True).start()
+
+    results = [None] * len(image_paths)
+    errors = {}
+    while True:
+        item = q_out.get()
+        if item is _DONE:
+            break
+        idx, src, final_out, error = item
+        if error is None:
+            results[idx] = final_out
+            print(f" Final image saved: {final_out}")
+        else:
+            errors[str(src)] = f"{type(error).__name__}: {error}"
+            print(f" Failed: {src.name}: {error}")
+
+    for closer in closers:
+        closer.join()
+
+    cache_stats = None
+    if cache is not None:
+        cache_stats = {k: cache.stats[k] - cache_before[k] for k in cache.stats}
+
+    stats = {
+        "images": len(image_paths),
+        "cache": cache_stats,
+        "wall_seconds": time.perf_counter() - start,
+        "stage_seconds": stage_seconds,
+        "errors": errors,
+    }
+    return results, stats
@@ -0,0 +1,61 @@
+"""
+Decides how much enhancement an image actually needs for the box it will
+fill on the slide, instead of always running Real-ESRGAN x4.
+
+The box is given in normalized slide coordinates (as in layouts/*.json) and
+turned into pixels at RENDER_DPI on a 13.33 x 7.5 in (16:9) slide.
+"""
+
+import cv2
+
+RENDER_DPI = 150
+SLIDE_WIDTH_IN = 13.333
+SLIDE_HEIGHT_IN = 7.5
+FULL_SLIDE_BOX = (1.0, 1.0)
+
+
+def target_pixels(box=FULL_SLIDE_BOX, dpi=RENDER_DPI):
+    """
+    box: (width, height) normalized to the slide. Returns (w_px, h_px).
+    """
+    box_w, box_h = box
+    return (
+        max(1, int(round(box_w * SLIDE_WIDTH_IN * dpi))),
+        max(1, int(round(box_h * SLIDE_HEIGHT_IN * dpi)))
+    )
+
+
+def choose_scale(src_w, src_h, target_w, target_h):
+    """
+    1 = skip upscaling, 2 or 4 = Real-ESRGAN outscale.
+    The image has to cover the box in both directions (cover fit), so the
+    larger of the two ratios decides.
+    """
+    need = max(target_w / src_w, target_h / src_h)
+    if need <= 1:
+        return 1
+    if need <= 2:
+        return 2
+    return 4
+
+
+def fit_exact(img, target_w, target_h):
+    """
+    Center-crops img to the target aspect ratio and resizes it to exactly
+    target_w x target_h, so assembly can place it without cropping.
+    """
+    h, w = img.shape[:2]
+    target_ratio = target_w / target_h
+    if w / h > target_ratio:
+        new_w = max(1, int(round(h * target_ratio)))
+        x0 = (w - new_w) // 2
+        img = img[:, x0:x0 + new_w]
+    else:
+        new_h = max(1, int(round(w / target_ratio)))
+        y0 = (h - new_h) // 2
+        img = img[y0:y0 + new_h]
+
+    if img.shape[1] == target_w and img.shape[0] == target_h:
+        return img
+    interp = cv2.INTER_AREA if img.shape[1] > target_w else cv2.INTER_CUBIC
+    return cv2.resize(img, (target_w, target_h), interpolation=interp)
@@ -1,47 +1,192 @@
+import re
 import cv2
 from pathlib import Path
+from PIL import Image
 
-from image_processing.upscale import upscale_image
-from image_processing.mask import generate_mask
+from runtime_config import get_config
+from image_processing.upscale import MODEL_NAME, get_upscaler
+from image_processing.cache import get_cache
+from image_processing.mask import get_masker
 from image_processing.smart_crop import smart_crop
+from image_processing.policy import FULL_SLIDE_BOX, RENDER_DPI, target_pixels, choose_scale, fit_exact
 
 
-def process_image(image_path):
+FINAL_DIR = get_config().final_dir  # default, see RuntimeConfig
+# extracted images, next to images_final/ in the outputs dir (pptx_extractor)
+RAW_IMAGES_DIR = "images"
+# what final_path appends to the name for a specific box
+BOX_SUFFIX = re.compile(r"_\d+x\d+$")
+
+
+def read_image(image_path):
+    img = cv2.imread(str(image_path))
+    if img is None:
+        raise RuntimeError(f"Could not read image: {image_path}")
+    return img
+
+
+def write_image(path, img):
+    # unlink first: the old file may be a hardlink into the enhanced-image cache
+    path = Path(path)
+    path.unlink(missing_ok=True)
+    if not cv2.imwrite(str(path), img):
+        raise RuntimeError(f"Could not write {path}")
+
+
+def upscale_for_target(img, target_w, target_h, upscaler=None, config=None):
+    """
+    Runs Real-ESRGAN only as far as the target size needs, deciding from
+    the decoded array's shape. Returns the source array itself when no
+    upscaling is needed. Callers decode the image once either way: both
+    branches need the pixels (for Real-ESRGAN or for the mask), so a
+    header-only size read would only add a second open.
+    """
+    h, w = img.shape[:2]
+    scale = choose_scale(w, h, target_w, target_h)
+    if scale == 1:
+        return img
+
+    upscaler = upscaler or get_upscaler(config)
+    return upscaler.upscale(img, outscale=scale)
+
+
+def crop_to_target(img, mask, target_w, target_h):
+    """
+    Smart crop at the box's own aspect ratio, then exactly the box's pixel size.
+    """
+    cropped = smart_crop(
+        image_path=img,
+        mask_path=mask,
+        target_ratio=target_w / target_h
+    )
+    return fit_exact(cropped, target_w, target_h)
+
+
+def final_path(image_path, target_box=FULL_SLIDE_BOX, dpi=RENDER_DPI, config=None):
+    """
+    images_final/<name> for the full-slide default (what changing_path looks
+    for), images_final/<stem>_<w>x<h><ext> for a specific layout box.
+    """
+    image_path = Path(image_path)
+    final_dir = (config or get_config()).final_dir
+    if tuple(target_box) == FULL_SLIDE_BOX:
+        return final_dir / image_path.name
+    w, h = target_pixels(target_box, dpi)
+    return final_dir / f"{image_path.stem}_{w}x{h}{image_path.suffix}"
+
+
+def cache_params(target_w, target_h):
+    # everything besides the source bytes that changes the output image
+    # (the 1x/2x/4x decision follows from the source size and the target)
+    return {
+        "model": MODEL_NAME,
+        "scale_policy": "cover",
+        "target_size": [target_w, target_h],
+        "target_ratio": round(target_w / target_h, 4),
+    }
+
+
+def process_image(image_path, target_box=FULL_SLIDE_BOX, dpi=RENDER_DPI, cache=None, use_cache=True, config=None):
     """
     Using models for enhancing image
+
+    target_box: (width, height) of the layout box the image will fill,
+    normalized to the slide. Images already big enough for it at `dpi` skip
+    Real-ESRGAN, others get 2x or 4x, and the result is cropped to exactly
+    the box's aspect ratio and pixel size. Everything stays in memory
+    between the steps.
+
+    Results are shared across runs through the enhanced-image cache
+    (image_processing.cache); use_cache=False always recomputes.
+
+    config: RuntimeConfig for model dirs, cache dir and the job's
+    images_final/ (process default when not given).
     """
 
-    
-    UPSCALED_DIR = Path("/kaggle/working/outputs/images_upscaled")
-    MASKS_DIR = Path("/kaggle/working/outputs/masks")
-    FINAL_DIR = Path("/kaggle/working/outputs/images_final")
+    config = config or get_config()
+    config.final_dir.mkdir(parents=True, exist_ok=True)
 
+    target_w, target_h = target_pixels(target_box, dpi)
+    final_out = final_path(image_path, target_box, dpi, config)
 
-    UPSCALED_DIR.mkdir(parents=True, exist_ok=True)
-    MASKS_DIR.mkdir(parents=True, exist_ok=True)
-    FINAL_DIR.mkdir(parents=True, exist_ok=True)
+    key = None
+    if use_cache:
+        cache = cache or get_cache(config)
+        key = cache.key(image_path, cache_params(target_w, target_h))
+        if cache.get(key, final_out):
+            return final_out
 
-    # Upscale (Real-ESRGAN)
-    upscaled_path = upscale_image(
-        image_path=image_path,
-        output_dir=UPSCALED_DIR
-    )
+    # Upscale (Real-ESRGAN), skipped if not needed
+    upscaled = upscale_for_target(read_image(image_path), target_w, target_h, config=config)
 
-    # Generate U-2-Net mask 
-    mask_path = generate_mask(
-        image_path=upscaled_path,
-        output_dir=MASKS_DIR
-    )
+    # Generate U-2-Net mask (low resolution, mapped back by smart_crop)
+    mask = get_masker(config).predict_masks([upscaled], [image_path])[0]
 
-    # Smart crop 
-    final_img = smart_crop(
-        image_path=str(upscaled_path),
-        mask_path=str(mask_path),
-        target_ratio=16/9
-    )
+    # Smart crop to the box
+    final_img = crop_to_target(upscaled, mask, target_w, target_h)
 
     # Save final image
-    final_out = FINAL_DIR / Path(image_path).name
-    cv2.imwrite(str(final_out), final_img)
+    write_image(final_out, final_img)
+    if key is not None:
+        cache.put(key, final_out)
 
     return final_out
+
+
+def raw_source(image_path, config=None):
+    """
+    The extracted image behind an images_final/ path, e.g. after
+    changing_path.update_all_slides has pointed slide sources at the
+    full-slide results. Those are already enhanced and cropped to 16:9, so
+    enhancing them again for a box would crop twice. Other paths, and
+    results whose source is gone, are returned as they are.
+    """
+    image_path = Path(image_path)
+    final_dir = (config or get_config()).final_dir
+    if image_path.parent.name != final_dir.name:
+        return image_path
+    name = BOX_SUFFIX.sub("", image_path.stem) + image_path.suffix
+    raw = image_path.parent.parent / RAW_IMAGES_DIR / name
+    return raw if raw.exists() else image_path
+
+
+def contain_box(image_path, box, dpi=RENDER_DPI):
+    """
+    The part of box (normalized) a "contain" image fills: the largest box
+    with the image's own aspect ratio that fits, so cropping to it keeps the
+    whole image. Reads only the image header.
+    """
+    with Image.open(image_path) as im:
+        img_w, img_h = im.size
+    box_w, box_h = target_pixels(box, dpi)
+    fit = min(box_w / img_w, box_h / img_h)
+    return (box[0] * img_w * fit / box_w, box[1] * img_h * fit / box_h)
+
+
+def process_bound_images(bound_elements, assets_dir=None, dpi=RENDER_DPI, config=None):
+    """
+    Layout-aware enhancement for one bound slide (output of
+    content_binder.bind_content + apply_image_rules), run instead of a
+    full-slide process_image() pass so every image is enhanced once, for
+    the box it actually fills. Sources are resolved back to the extracted
+    image (raw_source) first. "cover" images are cropped to their box;
+    "contain" images must stay whole and only get the box's resolution at
+    their own aspect ratio (contain_box). Each source is pointed at the
+    result, so assembly.add_image embeds a right-sized image with nothing
+    left to crop. assets_dir defaults to the config's outputs dir.
+    """
+    config = config or get_config()
+    assets_dir = Path(assets_dir or config.outputs_dir)
+    for el in bound_elements:
+        if el["type"] != "image" or not el.get("source"):
+            continue
+        src = raw_source(assets_dir / el["source"], config)
+        box = (el["width"], el["height"])
+        if el.get("fit") != "cover":
+            box = contain_box(src, box, dpi)
+        final_out = process_image(src, box, dpi, config=config)
+        try:
+            el["source"] = str(final_out.relative_to(assets_dir))
+        except ValueError:
+            el["source"] = str(final_out)
+    return bound_elements
@@ -2,39 +2,64 @@ import cv2
 import numpy as np
 
 
-def smart_crop(
-    image_path,
-    mask_path,
-    target_ratio=16/9,
-    padding=0.1
-):
-    """
-    Smart crop using U-2-Net mask.
+# cv2.imread flags for decoding a mask at reduced resolution
+REDUCED_MASK_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+# crop_box() from a mask smaller than the image stays within this many mask
+# pixels (per coordinate) of the box the full-size mask gives: the bbox edges
+# are off by up to half a mask pixel, and padding plus the aspect-ratio
+# expansion can scale that by up to ~1.2 * max(ratio, 1 / ratio)
+MAX_MASK_DRIFT = 3
 
-    image_path: upscaled image (Real-ESRGAN output)
-    mask_path: U-2-Net binary mask
-    target_ratio: width / height
-    padding: extra margin around object (10%)
+
+def foreground_bbox(mask, threshold=128):
     """
+    Inclusive (x_min, x_max, y_min, y_max) of mask pixels above threshold,
+    or None if there are none.
 
-    # Load image & mask
-    img = cv2.imread(image_path)
-    mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
+    Uses row/column max reductions, which only allocate one value per row and
+    column instead of np.where's two int64 arrays the size of the foreground.
+    """
+    rows = mask.max(axis=1) > threshold
+    cols = mask.max(axis=0) > threshold
+    if not rows.any():
+        return None
+    y_min = int(rows.argmax())
+    y_max = len(rows) - 1 - int(rows[::-1].argmax())
+    x_min = int(cols.argmax())
+    x_max = len(cols) - 1 - int(cols[::-1].argmax())
+    return x_min, x_max, y_min, y_max
 
-    h, w = img.shape[:2]
 
-    # Threshold mask
-    _, mask = cv2.threshold(mask, 128, 255, cv2.THRESH_BINARY)
+def crop_box(img_w, img_h, mask, target_ratio=16/9, padding=0.1):
+    """
+    Crop rectangle (x_min, y_min, x_max, y_max) for an img_w x img_h image,
+    or None to keep the whole image.
 
-    # Find foreground pixels
-    ys, xs = np.where(mask == 255)
+    mask may be smaller than the image (a downsampled or raw U-2-Net mask);
+    its bounding box is then mapped back to full resolution, rounded outwards.
+    That box differs from the one the mask resized to full size would give
+    by at most MAX_MASK_DRIFT mask pixels per coordinate.
+    """
+    bbox = foreground_bbox(mask)
+    if bbox is None:
+        return None
+    x_min, x_max, y_min, y_max = bbox
 
-    if len(xs) == 0 or len(ys) == 0:
-        # fallback: center crop
-        return img
+    mask_h, mask_w = mask.shape[:2]
+    if (mask_w, mask_h) != (img_w, img_h):
+        sx = img_w / mask_w
+        sy = img_h / mask_h
+        x_min = int(np.floor(x_min * sx))
+        y_min = int(np.floor(y_min * sy))
+        x_max = min(img_w - 1, int(np.ceil((x_max + 1) * sx)) - 1)
+        y_max = min(img_h - 1, int(np.ceil((y_max + 1) * sy)) - 1)
 
-    x_min, x_max = xs.min(), xs.max()
-    y_min, y_max = ys.min(), ys.max()
+    w, h = img_w, img_h
 
     # Add padding
     bw = x_max - x_min
@@ -70,4 +95,39 @@ def smart_crop(
     x_min, y_min = max(0, x_min), max(0, y_min)
     x_max, y_max = min(w, x_max), min(h, y_max)
 
+    return x_min, y_min, x_max, y_max
+
+
+def smart_crop(
+    image_path,
+    mask_path,
+    target_ratio=16/9,
+    padding=0.1,
+    mask_scale=1
+):
+    """
+    Smart crop using U-2-Net mask.
+
+    image_path: upscaled image (Real-ESRGAN output), path or numpy array
+    mask_path: U-2-Net mask, path or numpy array (may be lower resolution)
+    target_ratio: width / height
+    padding: extra margin around object (10%)
+    mask_scale: 2, 4 or 8 to decode a mask file at reduced resolution
+    """
+
+    # Load image & mask
+    img = image_path if isinstance(image_path, np.ndarray) else cv2.imread(str(image_path))
+    if isinstance(mask_path, np.ndarray):
+        mask = mask_path
+    else:
+        mask = cv2.imread(str(mask_path), REDUCED_MASK_FLAGS[mask_scale])
+
+    h, w = img.shape[:2]
+
+    box = crop_box(w, h, mask, target_ratio, padding)
+    if box is None:
+        # fallback: center crop
+        return img
+
+    x_min, y_min, x_max, y_max = box
     return img[y_min:y_max, x_min:x_max]
@@ -0,0 +1,107 @@
+"""
+Tiled upscaling with bounded memory.
+
+Real-ESRGAN's activations grow with the input area, so a large frame on a
+CPU node can OOM or swap. Here the input is cut into overlapping tiles, each
+tile is upscaled on its own (optionally several at once on a thread pool)
+and pasted into an output canvas (of the input's dtype) in raster order,
+linearly blending the overlap with the already pasted neighbours so no
+seams show.
+
+Peak memory is roughly the output image plus `workers` tiles' worth of
+model activations.
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+TILE_SIZE = 256
+TILE_OVERLAP = 16
+MIN_TILE_SIZE = 64
+# rough RRDBNet x4 peak activation bytes per input pixel (fp32, 64 feature
+# maps at 1x/2x/4x resolution plus the dense-block concatenations)
+BYTES_PER_INPUT_PIXEL = 6 * 1024
+
+
+def tile_size_for_budget(memory_budget_mb, workers=1, overlap=TILE_OVERLAP):
+    """
+    Largest square tile whose activations for `workers` concurrent tiles fit
+    in memory_budget_mb (the output canvas is not included).
+    """
+    per_tile = memory_budget_mb * 1024 * 1024 / max(1, workers)
+    side = int(math.sqrt(per_tile / BYTES_PER_INPUT_PIXEL))
+    return max(MIN_TILE_SIZE, side - 2 * overlap)
+
+
+def tile_starts(length, tile, overlap):
+    """
+    Tile origins along one axis; the last tile is aligned to the end.
+    """
+    if length <= tile:
+        return [0]
+    step = tile - overlap
+    return list(range(0, length - tile, step)) + [length - tile]
+
+
+def _ramp(n):
+    # blend weights for an n-pixel overlap, excluding the 0 and 1 end points
+    return (np.arange(1, n + 1, dtype=np.float32) / (n + 1))
+
+
+def upscale_tiled(img, upscale_tile, outscale, tile=TILE_SIZE, overlap=TILE_OVERLAP, workers=1):
+    """
+    img: HxW or HxWxC uint8 or uint16 array; the output has the same dtype.
+    upscale_tile: callable(tile array) -> tile upscaled by exactly outscale
+    (rounded per edge as below); it is called from `workers` threads.
+    """
+    h, w = img.shape[:2]
+    out_h, out_w = int(round(h * outscale)), int(round(w * outscale))
+    out = np.zeros((out_h, out_w) + img.shape[2:], dtype=img.dtype)
+    top_value = np.iinfo(img.dtype).max
+
+    ys = tile_starts(h, tile, overlap)
+    xs = tile_starts(w, tile, overlap)
+    boxes = [(y, x, min(y + tile, h), min(x + tile, w)) for y in ys for x in xs]
+
+    def run(box):
+        y0, x0, y1, x1 = box
+        up = upscale_tile(img[y0:y1, x0:x1])
+        size = (int(round(x1 * outscale)) - int(round(x0 * outscale)),
+                int(round(y1 * outscale)) - int(round(y0 * outscale)))
+        if (up.shape[1], up.shape[0]) != size:
+            up = cv2.resize(up, size, interpolation=cv2.INTER_LANCZOS4)
+        return up
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # map() hands results back in raster order, which the blending relies on
+        for (y0, x0, y1, x1), up in zip(boxes, pool.map(run, boxes)):
+            oy0, ox0 = int(round(y0 * outscale)), int(round(x0 * outscale))
+            th, tw = up.shape[:2]
+
+            # widths of the overlaps with the tiles to the left and above, which are already pasted
+            ov_left = ov_top = 0
+            left = xs.index(x0)
+            if left > 0:
+                ov_left = min(tw, int(round((min(xs[left - 1] + tile, w) - x0) * outscale)))
+            top = ys.index(y0)
+            if top > 0:
+                ov_top = min(th, int(round((min(ys[top - 1] + tile, h) - y0) * outscale)))
+            wx = np.ones(tw, dtype=np.float32)
+            wx[:ov_left] = _ramp(ov_left)
+            wy = np.ones(th, dtype=np.float32)
+            wy[:ov_top] = _ramp(ov_top)
+
+            region = out[oy0:oy0 + th, ox0:ox0 + tw]
+            # only the overlap strips are blended (top incl. the corner, then left); the rest is a copy
+            for rows, cols in ((slice(0, ov_top), slice(0, tw)), (slice(ov_top, th), slice(0, ov_left))):
+                alpha = wy[rows, None] * wx[None, cols]
+                if up.ndim == 3:
+                    alpha = alpha[:, :, None]
+                blended = region[rows, cols].astype(np.float32) * (1 - alpha) + up[rows, cols].astype(np.float32) * alpha
+                region[rows, cols] = np.clip(blended + 0.5, 0, top_value).astype(img.dtype)
+            region[ov_top:, ov_left:] = up[ov_top:, ov_left:]
+
+    return out
@@ -1,50 +1,216 @@
-import subprocess
-import sys
+import threading
 from pathlib import Path
-import time
 
+import cv2
+import numpy as np
 
-def upscale_image(image_path, output_dir):
+from runtime_config import get_config
+from image_processing.tiling import TILE_OVERLAP, tile_size_for_budget, upscale_tiled
+
+
+REAL_ESRGAN_DIR = get_config().real_esrgan_dir  # default, see RuntimeConfig
+MODEL_NAME = "RealESRGAN_x4plus"
+OUTPUT_SUFFIX = "out"  # same naming as inference_realesrgan.py: <stem>_out.png
+
+
+def load_realesrgan(model_path=None, tile=0, half=None, config=None):
     """
-    Upscale image using Real-ESRGAN and return actual output path.
+    Builds the RealESRGANer that inference_realesrgan.py uses for
+    RealESRGAN_x4plus, loading the weights once.
+    """
+    import torch
+    from basicsr.archs.rrdbnet_arch import RRDBNet
+    from realesrgan import RealESRGANer
+
+    if model_path is None:
+        model_path = (config or get_config()).real_esrgan_dir / "weights" / f"{MODEL_NAME}.pth"
+    if half is None:
+        # fp16 only makes sense on GPU
+        half = torch.cuda.is_available()
+
+    net = RRDBNet(num_in_ch=3, num_out_ch=3, num_feat=64, num_block=23, num_grow_ch=32, scale=4)
+    return RealESRGANer(
+        scale=4,
+        model_path=str(model_path),
+        model=net,
+        tile=tile,
+        tile_pad=10,
+        pre_pad=0,
+        half=half
+    )
+
+
+class RealESRGANUpscaler:
     """
+    Keeps a Real-ESRGAN model resident instead of launching
+    inference_realesrgan.py (and reloading torch + weights) per image.
+
+    model: anything with RealESRGANer's `enhance(img, outscale=...)` ->
+    (output, mode) interface. Loaded lazily on first use when not given,
+    which also lets tests pass a lightweight stand-in.
+
+    tile: upscale images larger than tile x tile pixels in overlapping tiles
+    (see image_processing.tiling) instead of the whole frame at once. When
+    only memory_budget_mb is given, the tile size is derived from it.
+    tile_workers tiles are upscaled concurrently.
+    """
+
+    def __init__(
+        self,
+        model=None,
+        outscale=4,
+        model_path=None,
+        tile=None,
+        tile_overlap=TILE_OVERLAP,
+        tile_workers=1,
+        memory_budget_mb=None,
+        config=None
+    ):
+        self._model = model
+        self.outscale = outscale
+        self.model_path = model_path
+        self.config = config
+        if tile is None and memory_budget_mb is not None:
+            tile = tile_size_for_budget(memory_budget_mb, tile_workers, tile_overlap)
+        self.tile = tile
+        self.tile_overlap = tile_overlap
+        self.tile_workers = tile_workers
+        # RealESRGANer.enhance keeps its intermediate tensors on the instance,
+        # so every enhance() call on the shared model goes through this lock
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
 
-    REAL_ESRGAN_DIR = Path("/kaggle/working/Real-ESRGAN")
+    @property
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model = load_realesrgan(self.model_path, config=self.config)
+        return self._model
 
-    image_path = Path(image_path).resolve()
-    output_dir = Path(output_dir).resolve()
-    output_dir.mkdir(parents=True, exist_ok=True)
+    def upscale(self, img, outscale=None):
+        """
+        img: BGR / BGRA numpy array as read by cv2. Returns the upscaled array.
+        Safe to call from several threads; whole-frame upscales of one
+        upscaler run one at a time.
+        """
+        outscale = outscale or self.outscale
+        if self.tile and max(img.shape[:2]) > self.tile:
+            return self.upscale_tiled(img, outscale)
+        model = self.model
+        with self._lock:
+            output, _ = model.enhance(img, outscale=outscale)
+        return output
 
-    # Run Real-ESRGAN
-    cmd = [
-        sys.executable,
-        "inference_realesrgan.py",
-        "-n", "RealESRGAN_x4plus",
-        "-i", str(image_path),
-        "-o", str(output_dir),
-        "--ext", "png"
-    ]
+    def _forward(self, tile):
+        """
+        Upscales one BGR uint8 or uint16 tile by the network's native scale,
+        normalizing by the dtype's maximum like inference_realesrgan.py does
+        for 16-bit images, and returns the same dtype.
 
-    subprocess.run(cmd, cwd=REAL_ESRGAN_DIR, check=True)
+        Calls the wrapped network directly, which unlike enhance() can run in
+        several threads at once. Stand-in models without one go through
+        enhance under the lock.
+        """
+        model = self.model
+        net = getattr(model, "model", None)
+        if net is None:
+            with self._lock:
+                output, _ = model.enhance(tile, outscale=getattr(model, "scale", 4))
+            return output
 
-    # Wait for filesystem
-    time.sleep(1)
+        # only a real RealESRGANer needs torch, stand-ins must work without it
+        import torch
 
-    #  Check intended output directory
-    candidates = list(output_dir.glob("*"))
+        max_value = float(np.iinfo(tile.dtype).max)
+        rgb = cv2.cvtColor(tile, cv2.COLOR_BGR2RGB).astype(np.float32) / max_value
+        x = torch.from_numpy(rgb.transpose(2, 0, 1)).unsqueeze(0).to(model.device)
+        if model.half:
+            x = x.half()
+        with torch.no_grad():
+            y = net(x)
+        y = y.squeeze(0).float().clamp_(0, 1).cpu().numpy().transpose(1, 2, 0)
+        return cv2.cvtColor((y * max_value).round().astype(tile.dtype), cv2.COLOR_RGB2BGR)
 
-    if candidates:
-        candidates.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-        return candidates[0]
+    def upscale_tiled(self, img, outscale=None, tile=None):
+        """
+        Tiled version of upscale(). The alpha channel, if any, is resized
+        rather than run through the model, like RealESRGANer does by default.
+        """
+        outscale = outscale or self.outscale
+        tile = tile or self.tile
+        gray = img.ndim == 2
+        alpha = None
+        if gray:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        elif img.shape[2] == 4:
+            img, alpha = img[:, :, :3], img[:, :, 3]
 
-    #  FALLBACK: check Real-ESRGAN default results folder
-    fallback_dir = REAL_ESRGAN_DIR / "results"
-    fallback_files = list(fallback_dir.glob("**/*"))
+        output = upscale_tiled(
+            np.ascontiguousarray(img), self._forward, outscale,
+            tile=tile, overlap=self.tile_overlap, workers=self.tile_workers
+        )
 
-    if fallback_files:
-        fallback_files.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-        return fallback_files[0]
+        if gray:
+            return cv2.cvtColor(output, cv2.COLOR_BGR2GRAY)
+        if alpha is not None:
+            alpha = cv2.resize(alpha, (output.shape[1], output.shape[0]), interpolation=cv2.INTER_LINEAR)
+            output = np.dstack([output, alpha])
+        return output
 
-    #  If still nothing → real failure
-    raise RuntimeError("Real-ESRGAN ran but no output file was found")
+    def upscale_file(self, image_path, output_dir, outscale=None):
+        image_path = Path(image_path)
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
 
+        img = cv2.imread(str(image_path), cv2.IMREAD_UNCHANGED)
+        if img is None:
+            raise RuntimeError(f"Could not read image: {image_path}")
+
+        out_path = output_dir / f"{image_path.stem}_{OUTPUT_SUFFIX}.png"
+        if not cv2.imwrite(str(out_path), self.upscale(img, outscale)):
+            raise RuntimeError(f"Could not write upscaled image: {out_path}")
+        return out_path
+
+    def upscale_batch(self, inputs, output_dir=None, outscale=None):
+        """
+        inputs: image paths and/or arrays. Returns one result per input, in
+        the same order: the output path for paths (written to output_dir),
+        the upscaled array for arrays.
+        """
+        results = []
+        for item in inputs:
+            if isinstance(item, (str, Path)):
+                if output_dir is None:
+                    raise ValueError("output_dir is required when upscaling image paths")
+                results.append(self.upscale_file(item, output_dir, outscale))
+            else:
+                results.append(self.upscale(item, outscale))
+        return results
+
+
+_UPSCALERS = {}
+
+
+def get_upscaler(config=None):
+    """
+    Process-wide upscaler per model dir, so the model is loaded once per
+    worker even when jobs with different configs share it.
+    """
+    config = config or get_config()
+    if config.real_esrgan_dir not in _UPSCALERS:
+        _UPSCALERS[config.real_esrgan_dir] = RealESRGANUpscaler(config=config)
+    return _UPSCALERS[config.real_esrgan_dir]
+
+
+def upscale_image(image_path, output_dir=None, upscaler=None, config=None):
+    """
+    Upscale image using Real-ESRGAN and return actual output path.
+    The output is always output_dir/<stem>_out.png; output_dir defaults to
+    the job's scratch dir.
+    """
+    config = config or get_config()
+    if output_dir is None:
+        output_dir = config.scratch_dir / "upscaled"
+    upscaler = upscaler or get_upscaler(config)
+    return upscaler.upscale_file(Path(image_path).resolve(), Path(output_dir).resolve())
@@ -1,111 +1,137 @@
-import json
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import re
 
+from deck_loader import load_slide, load_slides, slide_number
+
 def extract_slide_features(slide_dir: Path):
-  
-    meta_path = slide_dir / f"{slide_dir.name}_metadata.json"
-    
-    
-    if not meta_path.exists():
-        return {k: 0 for k in [
-            "num_text_blocks", "total_text_length", "avg_text_len", "num_images",
-            "largest_image_area", "avg_image_area", "img_aspect_ratio",
-            "has_table", "has_quote", "has_digits", "is_agenda", "slide_density"
-        ]}
-
-    with open(meta_path, "r", encoding="utf-8") as f:
-        slide = json.load(f)
-
-    shapes = slide.get("shapes", [])
-    
-    # 2. Extract Shape Collections
-    text_shapes = [s for s in shapes if s.get("has_text") and s.get("text")]
-    image_shapes = [s for s in shapes if s.get("has_image")]
-    table_shapes = [s for s in shapes if s.get("has_table")]
-
-    # 3. Calculate Text Features
-    num_text_blocks = len(text_shapes)
-    
-    # Combine all text into one string for easier analysis
-    all_text_content = " ".join([s["text"] for s in text_shapes])
-    total_text_length = len(all_text_content)
-    
-    if num_text_blocks > 0:
-        avg_text_len = total_text_length / num_text_blocks
-    else:
-        avg_text_len = 0.0
-
-    # 4. Calculate Image Features
-    num_images = len(image_shapes)
-    img_areas = []
-    aspect_ratios = []
-
-    for img in image_shapes:
-        w = img.get("width_norm", 0)
-        h = img.get("height_norm", 0)
-        
-        # Area calculation
-        if w and h:
-            img_areas.append(w * h)
-            
-        # Aspect Ratio (Width / Height)
-        if h > 0:
-            aspect_ratios.append(w / h)
-        else:
-            aspect_ratios.append(0.0)
-
-    # Defaults if no images exist
-    largest_image_area = max(img_areas) if img_areas else 0.0
-    avg_image_area = sum(img_areas) / len(img_areas) if img_areas else 0.0
-    img_aspect_ratio = sum(aspect_ratios) / len(aspect_ratios) if aspect_ratios else 0.0
-
-    # 5. Calculate Boolean/Content Features
-    has_table = 1 if len(table_shapes) > 0 else 0
-    
-    # Check for quotes (standard " or smart quotes “ ”)
-    has_quote = 1 if any(char in all_text_content for char in ['"', '“', '”']) else 0
-    
-    # Check for any digits (0-9) in the text
-    has_digits = 1 if any(char.isdigit() for char in all_text_content) else 0
-    
-    # Check for "Agenda" keywords (case-insensitive)
-    agenda_keywords = ["agenda", "table of contents", "overview", "index", "contents"]
-    lower_text = all_text_content.lower()
-    is_agenda = 1 if any(kw in lower_text for kw in agenda_keywords) else 0
-
-    # 6. Calculate Density
-    # Heuristic: Total shapes divided by 10 (arbitrary normalization)
-    slide_density = round(len(shapes) / 10.0, 2)
-
-    # 7. Return Dictionary (Strict Order)
-    return {
+    """
+    Features of one slide_XX/ directory of an extracted deck, read through
+    deck_loader so decks written with --manifest work too. For a whole deck
+    build_features_from_ingestion() is much cheaper.
+    """
+    slide_dir = Path(slide_dir)
+    num = slide_number(slide_dir)
+    slide = load_slide(slide_dir.parent, num) if num is not None else None
+    if slide is None:
+        return {k: 0 for k in FEATURE_COLUMNS}
+
+    return slide_features(slide)
+
+
+FEATURE_COLUMNS = [
+    "num_text_blocks",
+    "total_text_length",
+    "avg_text_len",
+    "num_images",
+    "largest_image_area",
+    "avg_image_area",
+    "img_aspect_ratio",
+    "has_table",
+    "has_quote",
+    "has_digits",
+    "is_agenda",
+    "slide_density"]
+
+# Same definitions the training data was labelled with
+# (layout_generator/real_data_generator.py)
+DIGITS_PATTERN = r"[\d%$]"
+QUOTE_PATTERN = r'["“”]'
+AGENDA_KEYWORDS = ["agenda", "contents", "overview", "summary", "roadmap"]
+
+
+def shapes_table(slides):
+    """
+    All shapes of a deck as one flat table, one row per shape, with the
+    position of its slide in `slides` in the "slide" column.
+    """
+    rows = [
+        (i, bool(s.get("has_text")), s.get("text") or "", bool(s.get("has_image")),
+         bool(s.get("has_table")), float(s.get("width_norm") or 0), float(s.get("height_norm") or 0))
+        for i, slide in enumerate(slides)
+        for s in slide.get("shapes", [])
+    ]
+    columns = ["slide", "has_text", "text", "has_image", "has_table", "width_norm", "height_norm"]
+    return pd.DataFrame(rows, columns=columns).astype({
+        "slide": int, "has_text": bool, "has_image": bool, "has_table": bool,
+        "width_norm": float, "height_norm": float,
+    })
+
+
+def deck_features(slides):
+    """
+    Layout features for every slide of a deck (slide records as loaded by
+    deck_loader), one row per slide in input order: num_shapes plus
+    FEATURE_COLUMNS. Computed with grouped operations over shapes_table, so
+    the whole deck is featurized in one pass.
+
+    - text blocks are shapes with non-empty text; total_text_length is the
+      length of their texts joined with single spaces
+    - img_aspect_ratio is width / height of the largest image (the hero
+      image decides the layout), 0 if it has no height
+    - is_agenda looks at the first text block (usually the title) only
+    """
+    shapes = shapes_table(slides)
+    index = pd.RangeIndex(len(slides))
+    by_slide = shapes.groupby("slide")
+
+    text = shapes[shapes["has_text"] & (shapes["text"] != "")]
+    text_by_slide = text.groupby("slide")
+    num_text_blocks = text_by_slide.size().reindex(index, fill_value=0)
+    total_text_length = (
+        text["text"].str.len().groupby(text["slide"]).sum().reindex(index, fill_value=0)
+        + (num_text_blocks - 1).clip(lower=0)
+    )
+    avg_text_len = (total_text_length / num_text_blocks.where(num_text_blocks > 0)).fillna(0.0)
+
+    def any_text(pattern):
+        return text["text"].str.contains(pattern).groupby(text["slide"]).any().reindex(index, fill_value=False)
+
+    agenda_pattern = "|".join(re.escape(k) for k in AGENDA_KEYWORDS)
+    is_agenda = text_by_slide["text"].first().str.lower().str.contains(agenda_pattern).reindex(index, fill_value=False)
+
+    images = shapes[shapes["has_image"]]
+    areas = images["width_norm"] * images["height_norm"]
+    area_by_slide = areas.groupby(images["slide"])
+    num_images = area_by_slide.size().reindex(index, fill_value=0)
+    largest_image_area = area_by_slide.max().reindex(index, fill_value=0.0)
+    avg_image_area = area_by_slide.mean().reindex(index, fill_value=0.0)
+
+    hero = images.loc[area_by_slide.idxmax()] if len(images) else images
+    hero_ratio = pd.Series(
+        np.where(hero["height_norm"] > 0, hero["width_norm"] / hero["height_norm"].where(hero["height_norm"] > 0, 1.0), 0.0),
+        index=hero["slide"].to_numpy()
+    )
+    img_aspect_ratio = hero_ratio.reindex(index, fill_value=0.0)
+
+    has_table = by_slide["has_table"].any().reindex(index, fill_value=False)
+    num_shapes = by_slide.size().reindex(index, fill_value=0)
+
+    return pd.DataFrame({
+        "num_shapes": num_shapes,
         "num_text_blocks": num_text_blocks,
         "total_text_length": total_text_length,
-        "avg_text_len": round(avg_text_len, 2),
+        "avg_text_len": avg_text_len.round(2),
         "num_images": num_images,
-        "largest_image_area": round(largest_image_area, 3),
-        "avg_image_area": round(avg_image_area, 3),
-        "img_aspect_ratio": round(img_aspect_ratio, 3),
-        "has_table": has_table,
-        "has_quote": has_quote,
-        "has_digits": has_digits,
-        "is_agenda": is_agenda,
-        "slide_density": slide_density
-    }
-    
-
+        "largest_image_area": largest_image_area.round(4),
+        "avg_image_area": avg_image_area.round(4),
+        "img_aspect_ratio": img_aspect_ratio.round(2),
+        "has_table": has_table.astype(int),
+        "has_quote": any_text(QUOTE_PATTERN).astype(int),
+        "has_digits": any_text(DIGITS_PATTERN).astype(int),
+        "is_agenda": is_agenda.astype(int),
+        "slide_density": (num_shapes / 10.0).round(3),
+    }, index=index)
 
 
-def build_features_from_ingestion(ingestion_dir):
-    rows = []
-    ingestion_dir = Path(ingestion_dir)
-
-    for slide_dir in sorted(ingestion_dir.glob("slide_*")):
-        rows.append(extract_slide_features(slide_dir))
-
-    return pd.DataFrame(rows)
-
+def slide_features(slide):
+    """
+    Same features as extract_slide_features, from an already loaded slide
+    record (per-slide JSON or a deck manifest line).
+    """
+    return deck_features([slide])[FEATURE_COLUMNS].to_dict("records")[0]
 
 
+def build_features_from_ingestion(ingestion_dir):
+    return deck_features(load_slides(ingestion_dir))[FEATURE_COLUMNS]
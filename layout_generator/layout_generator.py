@@ -1,10 +1,21 @@
+import atexit
+import importlib.util
+import warnings
+
 import numpy as np
 import pandas as pd
-import joblib
-import json
-from pathlib import Path
 
-LAYOUT_DIR = Path("/kaggle/working/SlideRevamp/layouts")
+from runtime_config import get_config
+from input_for_layoutgenerator import FEATURE_COLUMNS
+from layout_generator.template_registry import get_registry
+from layout_generator.teacher_rules import LAYOUT_CLASSES, teacher_layout_ids
+from layout_generator.tree_model import NPZ_FILE, TreeEnsemble
+from layout_generator.prediction_cache import PredictionCache, cached_predict
+
+LAYOUT_MODEL_FILE = "layout_generator_xgb (4).pkl"
+LABEL_ENCODER_FILE = "layout_label_encoder (4).pkl"
+# what unpickling the XGBoost model and its label encoder imports
+XGBOOST_MODULES = ("joblib", "sklearn", "xgboost")
 
 def build_model_input(features, feature_columns):
     row = {}
@@ -14,43 +25,241 @@ def build_model_input(features, feature_columns):
         row[col] = features[col]
     return pd.DataFrame([row])
 
-def predict_layout(features, top_k=2):
-    FEATURE_COLUMNS = [
-        "num_text_blocks",
-        "total_text_length",
-        "avg_text_len",
-        "num_images",
-        "largest_image_area",
-        "avg_image_area",
-        "img_aspect_ratio",
-        "has_table",
-        "has_quote",
-        "has_digits",
-        "is_agenda",
-        "slide_density"]
-    X = build_model_input(features, FEATURE_COLUMNS)
-
-    layout_model = joblib.load("/kaggle/input/weights-for-layout-generator/layout_generator_xgb (4).pkl")
-    label_encoder = joblib.load("/kaggle/input/weights-for-layout-generator/layout_label_encoder (4).pkl")
-
-    probs = layout_model.predict_proba(X)[0]
-
-    top_indices = np.argsort(probs)[-top_k:][::-1]
-    layouts = label_encoder.inverse_transform(top_indices)
-
-    return [
-        {
-            "layout": layouts[i],
-            "confidence": float(probs[top_indices[i]])
-        }
-        for i in range(len(layouts))
-    ]
-
-def load_layout_template(layout_name):
-    path = LAYOUT_DIR / f"{layout_name}.json"
-    if not path.exists():
-        raise ValueError(f"Layout template not found: {layout_name}")
-    return json.loads(path.read_text())
+
+
+def build_model_frame(features_frame, feature_columns=FEATURE_COLUMNS):
+    """
+    Model input for many slides: a DataFrame (e.g. from
+    build_features_from_ingestion) or a list of feature dicts.
+    """
+    if not isinstance(features_frame, pd.DataFrame):
+        features_frame = pd.DataFrame(list(features_frame))
+    missing = [col for col in feature_columns if col not in features_frame.columns]
+    if missing:
+        raise KeyError(f"Missing feature: {missing[0]}")
+    return features_frame[feature_columns]
+
+
+class LayoutPredictor:
+    """
+    Holds the XGBoost layout model and its label encoder, loaded once, and
+    predicts every slide of a deck with a single predict_proba call.
+
+    cache: optional PredictionCache; slides whose features (quantized, if the
+    cache is set up so) were seen before are answered from it, the rest go
+    to the model in one batch.
+    """
+
+    model_file = LAYOUT_MODEL_FILE
+
+    def __init__(self, model=None, label_encoder=None, config=None, cache=None):
+        self._model = model
+        self._label_encoder = label_encoder
+        self.model_dir = (config or get_config()).layout_model_dir
+        self.cache = cache
+        if cache is not None:
+            cache.bind(self.fingerprint())
+
+    def fingerprint(self):
+        # changes whenever the model file is replaced
+        path = self.model_dir / self.model_file
+        if not path.exists():
+            return [type(self).__name__, str(path)]
+        st = path.stat()
+        return [type(self).__name__, str(path), st.st_size, st.st_mtime_ns]
+
+    @property
+    def model(self):
+        if self._model is None:
+            # unpickling needs xgboost + sklearn, only import them when used
+            import joblib
+            self._model = joblib.load(self.model_dir / LAYOUT_MODEL_FILE)
+        return self._model
+
+    @property
+    def label_encoder(self):
+        if self._label_encoder is None:
+            import joblib
+            self._label_encoder = joblib.load(self.model_dir / LABEL_ENCODER_FILE)
+        return self._label_encoder
+
+    def layout_names(self, indices):
+        return self.label_encoder.inverse_transform(indices.ravel()).reshape(indices.shape)
+
+    def predict_batch(self, features_frame, top_k=2):
+        """
+        Top-k layouts for every row of features_frame, in row order: one list
+        of {"layout", "confidence"} dicts per slide, best first.
+        """
+        X = build_model_frame(features_frame)
+        if len(X) == 0:
+            return []
+        if self.cache is not None:
+            return cached_predict(self.cache, X, top_k, self._predict_rows)
+        return self._predict_rows(X, top_k)
+
+    def _predict_rows(self, X, top_k):
+        probs = self.model.predict_proba(X)
+        top_indices = np.argsort(probs, axis=1)[:, -top_k:][:, ::-1]
+        layouts = self.layout_names(top_indices)
+        confidences = np.take_along_axis(probs, top_indices, axis=1)
+
+        return [
+            [
+                {
+                    "layout": str(layouts[row, i]),
+                    "confidence": float(confidences[row, i])
+                }
+                for i in range(top_indices.shape[1])
+            ]
+            for row in range(len(X))
+        ]
+
+    def predict(self, features, top_k=2):
+        return self.predict_batch(build_model_input(features, FEATURE_COLUMNS), top_k)[0]
+
+
+class NpzPredictor(LayoutPredictor):
+    """
+    LayoutPredictor on the .npz export of the XGBoost model
+    (layout_generator.tree_model): same probabilities, NumPy only.
+    """
+
+    model_file = NPZ_FILE
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = TreeEnsemble.load(self.model_dir / NPZ_FILE)
+        return self._model
+
+    def layout_names(self, indices):
+        return self.model.classes_[indices]
+
+
+class RulePredictor:
+    """
+    Same interface as LayoutPredictor, backed by the vectorized teacher rule
+    (no model files, no xgboost). The rule picks one layout, so every slide
+    gets a single prediction with confidence 1.0 whatever top_k is.
+    """
+
+    def __init__(self, config=None, cache=None):
+        self.cache = cache
+        if cache is not None:
+            cache.bind(self.fingerprint())
+
+    def fingerprint(self):
+        return [type(self).__name__]
+
+    def predict_batch(self, features_frame, top_k=2):
+        X = build_model_frame(features_frame)
+        if len(X) == 0:
+            return []
+        if self.cache is not None:
+            return cached_predict(self.cache, X, top_k, self._predict_rows)
+        return self._predict_rows(X, top_k)
+
+    def _predict_rows(self, X, top_k):
+        ids = teacher_layout_ids(X)
+        return [[{"layout": LAYOUT_CLASSES[int(i)], "confidence": 1.0}] for i in ids]
+
+    def predict(self, features, top_k=2):
+        return self.predict_batch(build_model_input(features, FEATURE_COLUMNS), top_k)[0]
+
+
+BACKENDS = {
+    "npz": NpzPredictor,
+    "xgboost": LayoutPredictor,
+    "rules": RulePredictor,
+}
+
+
+def _missing_modules(modules):
+    return [m for m in modules if importlib.util.find_spec(m) is None]
+
+
+def resolve_backend(config):
+    """
+    config.layout_backend, with "auto" meaning the first of npz, xgboost
+    whose model file is there (and, for xgboost, whose packages are
+    installed), and the rules otherwise. Falling back to the rules warns
+    with the reason, since it usually means a wrong layout_model_dir.
+    """
+    backend = config.layout_backend
+    if backend == "auto":
+        model_dir = config.layout_model_dir
+        reason = None
+        if (model_dir / NPZ_FILE).exists():
+            backend = "npz"
+        elif not (model_dir / LAYOUT_MODEL_FILE).exists():
+            reason = f"neither {NPZ_FILE} nor {LAYOUT_MODEL_FILE} is in {model_dir}"
+        else:
+            missing = _missing_modules(XGBOOST_MODULES)
+            if missing:
+                reason = f"{LAYOUT_MODEL_FILE} needs {', '.join(missing)}, which is not installed"
+            else:
+                backend = "xgboost"
+        if reason is not None:
+            warnings.warn(f"Layout backend auto: {reason}; using the rule-based layouts", RuntimeWarning, stacklevel=2)
+            backend = "rules"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown layout backend: {backend} (expected one of {', '.join(BACKENDS)}, auto)")
+    return backend
+
+
+_PREDICTORS = {}
+
+
+def prediction_cache_path(config, backend):
+    return config.cache_dir / "layout_predictions" / f"{backend}.json"
+
+
+def get_predictor(config=None, backend=None, persist_cache=False):
+    """
+    Process-wide predictor per backend and model dir, so model files are
+    loaded once per worker. backend overrides config.layout_backend.
+    Each predictor gets an in-memory PredictionCache. persist_cache (also
+    for a predictor created earlier without it) loads it from
+    prediction_cache_path; it is saved back at the end of every
+    predict_layouts call and when the process exits.
+    """
+    config = config or get_config()
+    backend = resolve_backend(config) if backend is None else backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown layout backend: {backend}")
+    key = (backend, config.layout_model_dir)
+    if key not in _PREDICTORS:
+        _PREDICTORS[key] = BACKENDS[backend](config=config, cache=PredictionCache())
+    predictor = _PREDICTORS[key]
+    if persist_cache and predictor.cache.path is None:
+        predictor.cache.attach(prediction_cache_path(config, backend))
+        # predict_layout calls only reach the disk here
+        atexit.register(predictor.cache.save)
+    return predictor
+
+
+def predict_layout(features, top_k=2, config=None, backend=None, persist_cache=False):
+    return get_predictor(config, backend, persist_cache).predict(features, top_k)
+
+
+def predict_layouts(features_frame, top_k=2, config=None, backend=None, persist_cache=False):
+    """
+    predict_layout for a whole deck at once. Saves the prediction cache
+    afterwards if it is persisted (see get_predictor).
+    """
+    predictor = get_predictor(config, backend, persist_cache)
+    predictions = predictor.predict_batch(features_frame, top_k)
+    predictor.cache.save()
+    return predictions
+
+def load_layout_template(layout_name, config=None):
+    """
+    Validated, immutable template from the process-wide registry (all
+    layouts are read once); index it like the parsed JSON, e.g.
+    layout["elements"]. Raises ValueError for unknown layouts.
+    """
+    return get_registry(config).get(layout_name)
 
 
 
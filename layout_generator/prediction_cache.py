@@ -0,0 +1,185 @@
+"""
+Memoized layout predictions.
+
+Section headers, repeated bullet slides and other templated slides have the
+same feature vector, so a deck often needs far fewer model evaluations
+than it has slides. PredictionCache keys predictions on the exact 12 model
+features. Quantizing continuous features (e.g. COARSE_QUANTIZATION) lets
+near-identical slides share an entry too, at the cost of giving them the
+prediction of whichever was seen first, so it is opt-in. The cache is a
+bounded LRU, counts hits and misses, and can be saved to disk to be reused
+by later runs.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from input_for_layoutgenerator import FEATURE_COLUMNS
+
+CACHE_MAX_ENTRIES = 10000
+# opt-in steps per continuous feature; counts, lengths and flags stay exact.
+# Slides in the same bin get the prediction of the first one seen, so keep
+# the steps well below the distances the model/rules split on.
+COARSE_QUANTIZATION = {
+    "avg_text_len": 0.5,
+    "largest_image_area": 0.002,
+    "avg_image_area": 0.002,
+    "img_aspect_ratio": 0.01,
+}
+CACHE_FORMAT = 1
+
+
+class PredictionCache:
+    """
+    quantization: {feature: step}, e.g. COARSE_QUANTIZATION; features without
+    a step (or step 0) are matched exactly, which is the default. path: JSON
+    file the cache is loaded from and save()d to, tagged with the
+    predictor's fingerprint so entries from another model are dropped
+    instead of served.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, quantization=None, path=None):
+        self.max_entries = max_entries
+        self.quantization = dict(quantization or {})
+        self.path = Path(path) if path else None
+        self.fingerprint = None
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._entries = OrderedDict()
+        # entries added since the last save()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def keys(self, X):
+        """
+        One hashable key per row of the model input frame X.
+        """
+        columns = []
+        for col in FEATURE_COLUMNS:
+            values = X[col].to_numpy(dtype=np.float64)
+            step = self.quantization.get(col)
+            if step:
+                values = np.floor(values / step + 0.5)
+            columns.append(values)
+        return [tuple(row) for row in np.column_stack(columns).tolist()]
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def count_hits(self, n):
+        """
+        Records n lookups answered without the cache, e.g. repeats of a key
+        within one batch.
+        """
+        with self._lock:
+            self.stats["hits"] += n
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._dirty = True
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def bind(self, fingerprint):
+        """
+        Attaches the cache to a model (fingerprint: any JSON-able value that
+        changes with it) and loads the on-disk entries saved for that model.
+        """
+        if fingerprint != self.fingerprint:
+            self.clear()
+        self.fingerprint = fingerprint
+        if self.path is None or not self.path.exists():
+            return
+        data = json.loads(self.path.read_text(encoding="utf-8"))
+        if (data.get("format") != CACHE_FORMAT or data.get("fingerprint") != fingerprint
+                or data.get("quantization") != self.quantization):
+            return
+        for key, value in data["entries"][-self.max_entries:]:
+            self.put(tuple(key), value)
+
+    def attach(self, path):
+        """
+        Starts persisting an in-memory cache: loads the entries saved at
+        path for the bound model, on top of the ones already held, and
+        save()s there from now on.
+        """
+        self.path = Path(path)
+        self.bind(self.fingerprint)
+
+    def save(self):
+        """
+        Writes the cache to path (tmp + rename), unless nothing was added
+        since the last save. Returns the path, None without one.
+        """
+        if self.path is None:
+            return None
+        with self._lock:
+            if not self._dirty and self.path.exists():
+                return self.path
+            entries = [[list(k), v] for k, v in self._entries.items()]
+            self._dirty = False
+        data = {
+            "format": CACHE_FORMAT,
+            "fingerprint": self.fingerprint,
+            "quantization": self.quantization,
+            "entries": entries,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        return self.path
+
+
+def cached_predict(cache, X, top_k, predict_rows):
+    """
+    predict_rows(X, top_k) for the rows of X missing from cache, once per
+    distinct key, with everything else served from cache. Returns one
+    prediction list per row of X, in order.
+
+    Each distinct key is looked up once; its other rows in X count as hits,
+    since they are answered without the model either (100 identical rows:
+    1 miss, 99 hits).
+    """
+    keys = [(top_k,) + k for k in cache.keys(X)]
+    first_row = {}
+    for i, key in enumerate(keys):
+        first_row.setdefault(key, i)
+    cache.count_hits(len(keys) - len(first_row))
+
+    found = {key: cache.get(key) for key in first_row}
+    todo = [key for key, value in found.items() if value is None]
+    if todo:
+        rows = [first_row[key] for key in todo]
+        for key, value in zip(todo, predict_rows(X.iloc[rows], top_k)):
+            cache.put(key, value)
+            found[key] = value
+    results = [found[key] for key in keys]
+    # copies, so a caller editing its predictions cannot change the cache
+    return [[dict(p) for p in preds] for preds in results]
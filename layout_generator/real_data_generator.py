@@ -1,224 +1,194 @@
-import os
+"""
+Builds the real-slide training set: every extracted deck (pptx_extractor
+output) under one or more ingestion roots is featurized with the shared
+feature engine and labelled with the teacher rule.
+
+Decks are processed in parallel worker processes. Rows go to numbered
+parquet shards in out_dir, and a slide that appears in several decks (same
+slide digest) is written only once. out_dir/build_state.json records the
+decks that are already in a shard, so an interrupted or extended build only
+processes new decks.
+"""
+
+import argparse
+import hashlib
 import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
 from pathlib import Path
-import numpy as np
-import re
-
-INGESTION_DIR = Path("out(1)")   # input directory
-OUTPUT_CSV = "real_layout_dataset.csv"
-
-# LAYOUT LABELS (16 Classes)
-LAYOUT_CLASSES = {
-    0: "text_only",
-    1: "title_center",
-    2: "two_column",
-    3: "three_column",
-    4: "four_column",
-    5: "image_left",
-    6: "image_right",
-    7: "image_top",
-    8: "image_bottom",
-    9: "image_grid",
-    10: "image_background",
-    11: "big_stat",
-    12: "quote",
-    13: "timeline",
-    14: "table_center",
-    15: "agenda"
-}
-
-# Reverse map for easier coding(key becomes value and value becomes key in dictionary)
-LABEL_TO_ID = {v: k for k, v in LAYOUT_CLASSES.items()}
-
-#  (The 16-Class Logic)
-def teacher_layout_rule(row):
-    # Unpack features
-    imgs = row["num_images"]
-    txt_blocks = row["num_text_blocks"]
-    txt_len = row["total_text_length"]
-    table = row["has_table"]
-    
-    # New features
-    ratio = row["img_aspect_ratio"]
-    quote = row["has_quote"]
-    digits = row["has_digits"]
-    agenda = row["is_agenda"]
-
-    
-    if table:
-        return "table_center"
-    if agenda:
-        return "agenda"
-
-  
-    if imgs <= 1 and quote:
-        return "quote"
-    
-    if imgs == 0 and digits and txt_len < 100:
-        return "big_stat"
-
-    if imgs == 0:
-        if txt_len < 300:
-            return "title_center"
-        
-        if txt_blocks == 2:
-            return "two_column"
-        elif txt_blocks == 3:
-            return "three_column"
-        elif txt_blocks == 4:
-            return "four_column" 
-        elif txt_blocks >= 5:
-            return "timeline"
-            
-        return "text_only"
-
-  
-    if imgs == 1:
-        # Background check (Large image + low text)
-        if row["largest_image_area"] > 0.8 and txt_len < 200:
-            return "image_background"
-            
-        # Wide images (> 1.5 ratio) -> Top or Bottom
-        if ratio > 1.5:
-            # Simple heuristic: if text is short, maybe bottom? Default to top.
-            return "image_top" 
-        # Tall/Square images -> Left or Right
-        else:
-            return "image_right" # Default to right for consistency
-
-   
-    if imgs >= 2:
-        return "image_grid"
-
-    return "text_only" # Fallback
-
-
-rows = []
-
-print(f"Processing real slides from: {INGESTION_DIR}")
-
-# Check if folder exists
-if not INGESTION_DIR.exists():
-    print(f"Error: Directory {INGESTION_DIR} not found.")
-    exit()
-
-for slide_dir in sorted(INGESTION_DIR.iterdir()):
-    if not slide_dir.is_dir() or not slide_dir.name.startswith("slide_"):
-        continue
-
-    # Find first matching json/csv
-    try:
-        meta_file = next(slide_dir.glob("*_metadata.json")) 
-    except StopIteration:
-        continue # Skip if missing files
-
-    with open(meta_file, "r", encoding="utf-8") as f:
-        slide = json.load(f)
-
-    shapes = slide["shapes"]
-
-    # text features
-    text_shapes = [s for s in shapes if s.get("has_text") and s.get("text")]
-    num_text_blocks = len(text_shapes)
-
-    # Combine all text to check for keywords
-    all_text_combined = " ".join([s.get("text", "") for s in text_shapes])
-    total_text_len = len(all_text_combined)
-
-    avg_text_len = (
-        total_text_len / num_text_blocks
-        if num_text_blocks > 0 else 0
-    )
-
-    # image features
-    image_shapes = [s for s in shapes if s.get("has_image")]
-    num_images = len(image_shapes)
-
-    largest_img_area = 0.0
-    avg_img_area = 0.0
-    img_aspect_ratio = 0.0
-
-    if num_images > 0:
-        # Calculate areas and ratios from normalized coords
-        areas = []
-        ratios = []
-        for img in image_shapes:
-            w = img.get("width_norm", 0)
-            h = img.get("height_norm", 0)
-            areas.append(w * h)
-            if h > 0:
-                ratios.append(w / h)
-        
-        largest_img_area = max(areas) if areas else 0
-        avg_img_area = sum(areas) / len(areas) if areas else 0
-        
-        # I use the aspect ratio of the LARGEST image to decide layout
-        #  the hero image dictates the layout)
-        if areas:
-            max_idx = areas.index(largest_img_area)
-            img_aspect_ratio = ratios[max_idx]
-            
-    
-    has_table = int(any(s.get("has_table") for s in shapes))
-    
-    has_digits = 1 if re.search(r'[\d%$]', all_text_combined) else 0
-    
-
-    has_quote = 1 if re.search(r'["“”]', all_text_combined) else 0
-    
-    # Check first few words or title for "Agenda", "Contents"
-    is_agenda = 0
-    if len(all_text_combined) > 0:
-        # Check the first text block (likely title)
-        title_cand = text_shapes[0].get("text", "").lower()
-        if any(x in title_cand for x in ["agenda", "contents", "overview", "summary", "roadmap"]):
-            is_agenda = 1
-
-    # structural features
-    num_shapes = len(shapes)
-    slide_density = round(num_shapes / 10.0, 3)
-
-    # final row
-    row = {
-        "num_shapes": num_shapes,
-        "num_text_blocks": num_text_blocks,
-        "total_text_length": total_text_len,
-        "avg_text_len": round(avg_text_len, 2),
-        "num_images": num_images,
-        "largest_image_area": round(largest_img_area, 4),
-        "avg_image_area": round(avg_img_area, 4),
-        "img_aspect_ratio": round(img_aspect_ratio, 2),
-        "has_table": has_table,
-        "has_quote": has_quote,
-        "has_digits": has_digits,
-        "is_agenda": is_agenda,
-        "slide_density": slide_density,
-        
-    }
-
-    # label
-    row["layout_class_name"] = teacher_layout_rule(row)
-    # Map back to ID 
-    row["layout_class"] = LABEL_TO_ID.get(row["layout_class_name"], 0)
-    row["source"] = "real"
-
-    rows.append(row)
-
-#save
-if not rows:
-    print("No slides found! Check INGESTION_DIR path.")
-else:
-    file_exists = os.path.exists(OUTPUT_CSV)
-    df = pd.DataFrame(rows)
-    
-    # Save
-    df.to_csv(OUTPUT_CSV, 
-              mode="a",              # append mode
-              header=not file_exists, # write header only once
-              index=False)
-
-    print(f"Real layout dataset created: {OUTPUT_CSV}")
-    print(f"Rows processed: {len(df)}")
-    print("\nClass Distribution Found in Real Data:")
-    print(df["layout_class_name"].value_counts())
\ No newline at end of file
+
+# run as a script from layout_generator/: the feature engine lives at the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from deck_loader import MANIFEST_NAME, load_slides
+from input_for_layoutgenerator import deck_features
+from layout_generator.teacher_rules import LAYOUT_CLASSES, teacher_layout_ids
+
+INGESTION_DIR = Path("out(1)")   # default input directory
+OUTPUT_DIR = Path("real_layout_dataset")
+STATE_FILE = "build_state.json"
+SHARD_SIZE = 50000  # rows per parquet shard
+
+
+def label_frame(df):
+    df["layout_class"] = teacher_layout_ids(df)
+    df["layout_class_name"] = df["layout_class"].map(LAYOUT_CLASSES)
+    df["source"] = "real"
+    return df
+
+
+def is_ingestion_dir(path):
+    path = Path(path)
+    return (path / MANIFEST_NAME).exists() or any(p.is_dir() for p in path.glob("slide_*"))
+
+
+def find_ingestion_dirs(roots):
+    """
+    Every extracted deck under roots: a root that is an ingestion dir itself,
+    or any ingestion dir below it (e.g. an extract_batch out_root).
+    """
+    found = []
+    for root in roots:
+        for dirpath, dirnames, _ in os.walk(root):
+            if is_ingestion_dir(dirpath):
+                found.append(Path(dirpath).resolve())
+                dirnames[:] = []  # slide_* dirs are not decks of their own
+            else:
+                dirnames.sort()
+    return found
+
+
+def slide_ids(deck_dir, slides):
+    """
+    One identity per slide: the digest pptx_extractor recorded for it in
+    metadata.json (slide XML plus the parts it uses), or a hash of the slide
+    record for output written before digests existed. Copies of a slide in
+    other decks share it; different slides with equal features do not.
+    """
+    meta_path = Path(deck_dir) / "metadata.json"
+    digests = {}
+    if meta_path.exists():
+        metadata = json.loads(meta_path.read_text(encoding="utf-8"))
+        digests = {e["slide_num"]: e["digest"] for e in metadata.get("slides", []) if e.get("digest")}
+
+    ids = []
+    for slide in slides:
+        digest = digests.get(slide.get("slide_num"))
+        if digest is None:
+            # position in the deck is not part of what the slide is
+            content = {k: v for k, v in slide.items() if k not in ("slide_index", "slide_num")}
+            digest = hashlib.sha1(json.dumps(content, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+        ids.append(digest)
+    return ids
+
+
+def _featurize_deck(deck_dir):
+    slides = load_slides(deck_dir)
+    df = label_frame(deck_features(slides))
+    df["slide_id"] = slide_ids(deck_dir, slides)
+    return df
+
+
+def _load_state(out_dir):
+    state_path = out_dir / STATE_FILE
+    if state_path.exists():
+        return json.loads(state_path.read_text(encoding="utf-8"))
+    return {"decks": {}, "failed": {}, "shards": []}
+
+
+def _save_state(out_dir, state):
+    state_path = out_dir / STATE_FILE
+    tmp_path = state_path.with_name(state_path.name + ".tmp")
+    tmp_path.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, state_path)
+
+
+def build_dataset(roots=(INGESTION_DIR,), out_dir=OUTPUT_DIR, workers=None, shard_size=SHARD_SIZE):
+    """
+    Featurizes and labels every deck under roots into out_dir/shard_XXXXX.parquet.
+    Decks listed in out_dir/build_state.json are skipped. A deck is marked
+    done only once its rows are in a written shard. Failed decks are
+    recorded and retried on the next run.
+    Returns the state dict.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    state = _load_state(out_dir)
+
+    seen = set()
+    for shard in state["shards"]:
+        seen.update(pd.read_parquet(out_dir / shard, columns=["slide_id"])["slide_id"].tolist())
+
+    decks = [d for d in find_ingestion_dirs(roots) if str(d) not in state["decks"]]
+    print(f"{len(decks)} new decks to process ({len(state['decks'])} already done)")
+
+    pending_frames, pending_decks = [], {}
+    pending_rows = 0
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal pending_frames, pending_decks, pending_rows
+        if pending_frames:
+            shard = f"shard_{len(state['shards']):05d}.parquet"
+            pd.concat(pending_frames, ignore_index=True).to_parquet(out_dir / shard, index=False)
+            state["shards"].append(shard)
+        state["decks"].update(pending_decks)
+        _save_state(out_dir, state)
+        pending_frames, pending_decks, pending_rows = [], {}, 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_featurize_deck, deck): deck for deck in decks}
+        for future in as_completed(futures):
+            deck = str(futures[future])
+            try:
+                df = future.result()
+            except Exception as e:
+                state["failed"][deck] = f"{type(e).__name__}: {e}"
+                print(f"Failed: {deck}: {e}")
+                continue
+            state["failed"].pop(deck, None)
+
+            new = ~df["slide_id"].isin(seen).to_numpy()
+            new &= ~df["slide_id"].duplicated().to_numpy()
+            df = df[new]
+            seen.update(df["slide_id"].tolist())
+
+            df.insert(0, "deck", deck)
+            pending_frames.append(df)
+            pending_rows += len(df)
+            pending_decks[deck] = {"slides": int(new.size), "rows": len(df)}
+            if pending_rows >= shard_size:
+                flush()
+
+    flush()
+    rows = sum(d["rows"] for d in state["decks"].values())
+    print(f"Done in {time.perf_counter() - start:.1f}s: {len(state['decks'])} decks, "
+          f"{rows} unique slides in {len(state['shards'])} shards, {len(state['failed'])} failed")
+    return state
+
+
+def load_dataset(out_dir=OUTPUT_DIR):
+    out_dir = Path(out_dir)
+    shards = _load_state(out_dir)["shards"]
+    if not shards:
+        return pd.DataFrame()
+    return pd.concat((pd.read_parquet(out_dir / s) for s in shards), ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the real-slide layout training set")
+    parser.add_argument("roots", nargs="*", type=Path, default=[INGESTION_DIR],
+                        help="ingestion dirs or directories containing them")
+    parser.add_argument("--out", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    args = parser.parse_args()
+
+    build_dataset(args.roots, args.out, args.workers, args.shard_size)
+    df = load_dataset(args.out)
+    if len(df):
+        print("\nClass Distribution Found in Real Data:")
+        print(df["layout_class_name"].value_counts())
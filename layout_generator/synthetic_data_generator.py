@@ -1,14 +1,14 @@
+import argparse
+import time
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
-import random
 
 SAMPLES_PER_CLASS = 3000
 OUTPUT_FILE = "synthetic_layout_dataset.csv"
 SEED = 42
 
-np.random.seed(SEED)
-random.seed(SEED)
-
 
 # Layout labels (16 Classes)
  
@@ -35,147 +35,166 @@ LAYOUT_CLASSES = {
 
 
 
-def generate_row(layout_id):
+def generate_class_block(layout_id, n, rng):
     """
-    Creates a row of features 
+    n rows of features for one layout class, drawn as whole arrays from rng
+    (a np.random.Generator). Same per-class distributions the old row-by-row
+    generate_row used; randint-style ranges exclude the upper bound.
     """
-    row = {}
-    
     # Defaults (Clean slate)
-    
-    row["num_text_blocks"] = 1
-    row["total_text_length"] = 100
-    row["avg_text_len"] = 0
-    row["num_images"] = 0
-    row["largest_image_area"] = 0.0
-    row["avg_image_area"] = 0.0
-    row["img_aspect_ratio"] = 0.0
-    row["has_table"] = 0
-    row["has_quote"] = 0
-    row["has_digits"] = 0
-    row["is_agenda"] = 0
-    row["slide_density"] = 0
-    row["source"] = "synthetic"
-
-    # 
-    
+    num_text_blocks = np.full(n, 1)
+    total_text_length = np.full(n, 100)
+    num_images = np.zeros(n, dtype=int)
+    largest_image_area = np.zeros(n)
+    avg_image_area = np.zeros(n)
+    img_aspect_ratio = np.zeros(n)
+    has_table = np.zeros(n, dtype=int)
+    has_quote = np.zeros(n, dtype=int)
+    has_digits = np.zeros(n, dtype=int)
+    is_agenda = np.zeros(n, dtype=int)
+
     if layout_id == 14: # table_center
-        row["has_table"] = 1
-        row["num_text_blocks"] = np.random.randint(0, 3)
-        row["total_text_length"] = np.random.randint(50, 200)
+        has_table[:] = 1
+        num_text_blocks = rng.integers(0, 3, n)
+        total_text_length = rng.integers(50, 200, n)
 
     elif layout_id == 15: # agenda
-        row["is_agenda"] = 1
-        row["num_text_blocks"] = np.random.randint(3, 8) 
-        row["total_text_length"] = np.random.randint(100, 500)
+        is_agenda[:] = 1
+        num_text_blocks = rng.integers(3, 8, n)
+        total_text_length = rng.integers(100, 500, n)
 
     elif layout_id == 12: # quote
-        row["has_quote"] = 1
-        row["num_images"] = np.random.choice([0, 1]) 
-        row["total_text_length"] = np.random.randint(50, 300)
-        if row["num_images"] == 1:
-            row["img_aspect_ratio"] = 1.0
-            row["largest_image_area"] = 0.1
+        has_quote[:] = 1
+        num_images = rng.integers(0, 2, n)
+        total_text_length = rng.integers(50, 300, n)
+        with_image = num_images == 1
+        img_aspect_ratio[with_image] = 1.0
+        largest_image_area[with_image] = 0.1
 
     elif layout_id == 11: # big_stat
-        row["has_digits"] = 1
-        row["total_text_length"] = np.random.randint(10, 80) # Very short
-        row["num_text_blocks"] = np.random.randint(1, 3) # Number + Caption
+        has_digits[:] = 1
+        total_text_length = rng.integers(10, 80, n) # Very short
+        num_text_blocks = rng.integers(1, 3, n) # Number + Caption
 
     elif layout_id == 1: # title_center
         # Must be short text, 0 images
-        row["total_text_length"] = np.random.randint(20, 140) 
-        row["num_text_blocks"] = 1
+        total_text_length = rng.integers(20, 140, n)
 
     elif layout_id == 0: # text_only
         # Must be longer text to avoid 'title_center'
-        row["total_text_length"] = np.random.randint(350, 800)
-        row["num_text_blocks"] = 1 # Single block body
+        total_text_length = rng.integers(350, 800, n)
 
     elif layout_id == 2: # two_column
-        row["num_text_blocks"] = 2
-        row["total_text_length"] = np.random.randint(300, 800)
+        num_text_blocks[:] = 2
+        total_text_length = rng.integers(300, 800, n)
 
     elif layout_id == 3: # three_column
-        row["num_text_blocks"] = 3
-        row["total_text_length"] = np.random.randint(300, 900)
+        num_text_blocks[:] = 3
+        total_text_length = rng.integers(300, 900, n)
 
     elif layout_id == 4: # four_column
-        row["num_text_blocks"] = 4
-        row["total_text_length"] = np.random.randint(400, 1000)
+        num_text_blocks[:] = 4
+        total_text_length = rng.integers(400, 1000, n)
 
     elif layout_id == 13: # timeline
-        row["num_text_blocks"] = np.random.randint(5, 8) # 5+ blocks usually implies timeline
-        row["total_text_length"] = np.random.randint(300, 800)
+        num_text_blocks = rng.integers(5, 8, n) # 5+ blocks usually implies timeline
+        total_text_length = rng.integers(300, 800, n)
 
     elif layout_id == 10: # image_background
-        row["num_images"] = 1
+        num_images[:] = 1
         # Must have low text to trigger Background mode
-        row["total_text_length"] = np.random.randint(50, 180)
-        row["largest_image_area"] = 1.0 # Full screen implies BG
-
-    elif layout_id == 7: # image_top
-        row["num_images"] = 1
-        row["img_aspect_ratio"] = np.random.uniform(1.7, 2.5) # Wide
-        row["total_text_length"] = np.random.randint(250, 600) # 
-        row["largest_image_area"] = 0.4
-
-    elif layout_id == 8: # image_bottom
-        row["num_images"] = 1
-        row["img_aspect_ratio"] = np.random.uniform(1.7, 2.5) # Wide
-        row["total_text_length"] = np.random.randint(250, 600)
-        row["largest_image_area"] = 0.4
-
-    elif layout_id == 5: # image_left
-        row["num_images"] = 1
-        row["img_aspect_ratio"] = np.random.uniform(0.6, 1.4) # Tall/Square
-        row["total_text_length"] = np.random.randint(200, 800)
-        row["largest_image_area"] = 0.4
-
-    elif layout_id == 6: # image_right
-        row["num_images"] = 1
-        row["img_aspect_ratio"] = np.random.uniform(0.6, 1.4) # Tall/Square
-        row["total_text_length"] = np.random.randint(200, 800)
-        row["largest_image_area"] = 0.4
-
-    elif layout_id == 9: # image_grid
-        row["num_images"] = np.random.randint(2, 6)
-        row["avg_image_area"] = 0.2
-    
-    # Derived Features
-    row["avg_text_len"] = row["total_text_length"] / row["num_text_blocks"] if row["num_text_blocks"] > 0 else 0
-    row["slide_density"] = round((row["num_text_blocks"] + row["num_images"]) / 10.0, 2)
-    row["layout_class_numeric"] = layout_id
-
-    
-    if row["num_images"] > 0:
-        row["img_aspect_ratio"] += np.random.normal(0, 0.05)
-        
-    return row
+        total_text_length = rng.integers(50, 180, n)
+        largest_image_area[:] = 1.0 # Full screen implies BG
 
+    elif layout_id in (7, 8): # image_top, image_bottom
+        num_images[:] = 1
+        img_aspect_ratio = rng.uniform(1.7, 2.5, n) # Wide
+        total_text_length = rng.integers(250, 600, n)
+        largest_image_area[:] = 0.4
 
+    elif layout_id in (5, 6): # image_left, image_right
+        num_images[:] = 1
+        img_aspect_ratio = rng.uniform(0.6, 1.4, n) # Tall/Square
+        total_text_length = rng.integers(200, 800, n)
+        largest_image_area[:] = 0.4
 
-all_data = []
-print(f"Generating balanced dataset ({SAMPLES_PER_CLASS} per class)...")
-
-for class_id in range(16):
-    print(f"  - Generating class {class_id}: {LAYOUT_CLASSES[class_id]}...")
-    for _ in range(SAMPLES_PER_CLASS):
-        sample = generate_row(class_id)
-        all_data.append(sample)
+    elif layout_id == 9: # image_grid
+        num_images = rng.integers(2, 6, n)
+        avg_image_area[:] = 0.2
 
-# Shuffle dataset so training doesn't see all 'text_only' first
-random.shuffle(all_data)
+    # Derived Features
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_text_len = np.where(num_text_blocks > 0, total_text_length / num_text_blocks, 0.0)
+    slide_density = np.round((num_text_blocks + num_images) / 10.0, 2)
+    img_aspect_ratio = img_aspect_ratio + np.where(num_images > 0, rng.normal(0, 0.05, n), 0.0)
+
+    return pd.DataFrame({
+        "num_text_blocks": num_text_blocks,
+        "total_text_length": total_text_length,
+        "avg_text_len": avg_text_len,
+        "num_images": num_images,
+        "largest_image_area": largest_image_area,
+        "avg_image_area": avg_image_area,
+        "img_aspect_ratio": img_aspect_ratio,
+        "has_table": has_table,
+        "has_quote": has_quote,
+        "has_digits": has_digits,
+        "is_agenda": is_agenda,
+        "slide_density": slide_density,
+        "source": "synthetic",
+        "layout_class_numeric": np.full(n, layout_id),
+    })
+
+
+def generate_dataset(samples_per_class=SAMPLES_PER_CLASS, seed=SEED, shuffle=True):
+    """
+    Balanced synthetic dataset, samples_per_class rows per layout class.
 
+    Every class draws from its own RNG stream spawned from seed, so a class's
+    rows only depend on the seed and its sample count, and the shuffle has a
+    stream of its own.
+    """
+    streams = np.random.SeedSequence(seed).spawn(len(LAYOUT_CLASSES) + 1)
+    blocks = [
+        generate_class_block(class_id, samples_per_class, np.random.default_rng(streams[class_id]))
+        for class_id in LAYOUT_CLASSES
+    ]
+    df = pd.concat(blocks, ignore_index=True)
 
-# save to CSV 
-df = pd.DataFrame(all_data)
+    # Shuffle dataset so training doesn't see all 'text_only' first
+    if shuffle:
+        order = np.random.default_rng(streams[-1]).permutation(len(df))
+        df = df.iloc[order].reset_index(drop=True)
 
-# Add string label for verification
-df["layout_class"] = df["layout_class_numeric"].map(LAYOUT_CLASSES)
+    # Add string label for verification
+    df["layout_class"] = df["layout_class_numeric"].map(LAYOUT_CLASSES)
+    return df
 
-df.to_csv(OUTPUT_FILE, index=False)
 
-print(f" Success! Saved {len(df)} samples to {OUTPUT_FILE}")
-print(" Verification of Distribution:")
-print(df["layout_class_name"].value_counts())
\ No newline at end of file
+def write_dataset(df, path=OUTPUT_FILE):
+    """
+    Writes parquet for a .parquet path, CSV otherwise.
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the synthetic layout training set")
+    parser.add_argument("--samples-per-class", type=int, default=SAMPLES_PER_CLASS)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", default=OUTPUT_FILE, help=".parquet or .csv")
+    args = parser.parse_args()
+
+    print(f"Generating balanced dataset ({args.samples_per_class} per class)...")
+    start = time.perf_counter()
+    df = generate_dataset(args.samples_per_class, args.seed)
+    out = write_dataset(df, args.output)
+
+    print(f" Success! Saved {len(df)} samples to {out} in {time.perf_counter() - start:.1f}s")
+    print(" Verification of Distribution:")
+    print(df["layout_class"].value_counts())
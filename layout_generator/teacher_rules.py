@@ -0,0 +1,74 @@
+"""
+The teacher rule that labels the real training slides
+(real_data_generator.label_frame), vectorized with NumPy masks.
+
+It only needs NumPy, so it doubles as the "rules" layout predictor backend:
+a whole deck in well under a millisecond, and a layout even where the
+XGBoost pickle or xgboost itself is unavailable.
+"""
+
+import numpy as np
+
+# LAYOUT LABELS (16 Classes)
+LAYOUT_CLASSES = {
+    0: "text_only",
+    1: "title_center",
+    2: "two_column",
+    3: "three_column",
+    4: "four_column",
+    5: "image_left",
+    6: "image_right",
+    7: "image_top",
+    8: "image_bottom",
+    9: "image_grid",
+    10: "image_background",
+    11: "big_stat",
+    12: "quote",
+    13: "timeline",
+    14: "table_center",
+    15: "agenda"
+}
+
+# Reverse map for easier coding(key becomes value and value becomes key in dictionary)
+LABEL_TO_ID = {v: k for k, v in LAYOUT_CLASSES.items()}
+
+
+def teacher_layout_ids(frame):
+    """
+    The teacher rule for a whole feature frame at once (DataFrame or
+    anything indexable by feature name), as layout class ids. The conditions
+    are checked in order and the first one that matches wins.
+    """
+    imgs = np.asarray(frame["num_images"])
+    txt_blocks = np.asarray(frame["num_text_blocks"])
+    txt_len = np.asarray(frame["total_text_length"])
+    table = np.asarray(frame["has_table"]).astype(bool)
+    ratio = np.asarray(frame["img_aspect_ratio"])
+    quote = np.asarray(frame["has_quote"]).astype(bool)
+    digits = np.asarray(frame["has_digits"]).astype(bool)
+    agenda = np.asarray(frame["is_agenda"]).astype(bool)
+    largest = np.asarray(frame["largest_image_area"])
+
+    no_img = imgs == 0
+    one_img = imgs == 1
+    rules = [
+        (table, "table_center"),
+        (agenda, "agenda"),
+        ((imgs <= 1) & quote, "quote"),
+        (no_img & digits & (txt_len < 100), "big_stat"),
+        (no_img & (txt_len < 300), "title_center"),
+        (no_img & (txt_blocks == 2), "two_column"),
+        (no_img & (txt_blocks == 3), "three_column"),
+        (no_img & (txt_blocks == 4), "four_column"),
+        (no_img & (txt_blocks >= 5), "timeline"),
+        (no_img, "text_only"),
+        (one_img & (largest > 0.8) & (txt_len < 200), "image_background"),
+        (one_img & (ratio > 1.5), "image_top"),
+        (one_img, "image_right"),
+        (imgs >= 2, "image_grid"),
+    ]
+    return np.select(
+        [cond for cond, _ in rules],
+        [LABEL_TO_ID[name] for _, name in rules],
+        default=LABEL_TO_ID["text_only"],
+    )
@@ -0,0 +1,159 @@
+"""
+In-memory registry of the layout templates in layouts/.
+
+All templates are read and validated once per process; after that every
+slide gets the same immutable LayoutTemplate with its slots per element type
+already counted, so the per-slide loop does no file IO. content_binder
+copies the elements it binds into plain dicts, so the templates themselves
+never change.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+
+from runtime_config import get_config
+
+ELEMENT_TYPES = ("text", "image", "table")
+REQUIRED_FIELDS = ("type", "x", "y", "width", "height")
+COORD_FIELDS = ("x", "y", "width", "height")
+
+
+def validate_template(data, name):
+    """
+    Problems with one parsed template, as messages (empty when valid).
+
+    Boxes are checked per coordinate: x, y, width and height must each lie
+    in [0, 1] with a non-zero size. Several shipped templates let a box run
+    a little past the slide edge (y + height up to 1.2), which is left alone.
+    z must be a number; elements without one are drawn at 0, like assembly
+    does.
+    """
+    problems = []
+    if data.get("name", name) != name:
+        problems.append(f"name {data.get('name')!r} does not match file name")
+    elements = data.get("elements")
+    if not isinstance(elements, list) or not elements:
+        return problems + ["no elements"]
+
+    for i, el in enumerate(elements):
+        where = f"element {i}"
+        missing = [f for f in REQUIRED_FIELDS if f not in el]
+        if missing:
+            problems.append(f"{where}: missing {', '.join(missing)}")
+            continue
+        if el["type"] not in ELEMENT_TYPES:
+            problems.append(f"{where}: unknown type {el['type']!r}")
+        for f in COORD_FIELDS:
+            value = el[f]
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or not 0 <= value <= 1:
+                problems.append(f"{where}: {f}={value!r} outside [0, 1]")
+        if el["width"] == 0 or el["height"] == 0:
+            problems.append(f"{where}: empty box")
+        z = el.get("z", 0)
+        if not isinstance(z, (int, float)) or isinstance(z, bool):
+            problems.append(f"{where}: z={z!r} is not a number")
+    return problems
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    """
+    Mutable, JSON-serializable copy of a frozen template value.
+    """
+    if isinstance(value, MappingProxyType) or isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (tuple, list)):
+        return [thaw(v) for v in value]
+    return value
+
+
+@dataclass(frozen=True)
+class LayoutTemplate:
+    name: str
+    background_color: str
+    elements: tuple
+    # element indices per type, in template order
+    slots: MappingProxyType
+    slot_counts: MappingProxyType
+
+    def __getitem__(self, key):
+        # lets code written for the parsed JSON dict (layout["elements"]) keep working
+        return getattr(self, key)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "background_color": self.background_color,
+            "elements": thaw(self.elements),
+        }
+
+
+def build_template(data, name):
+    elements = _freeze(data["elements"])
+    slots = {t: tuple(i for i, el in enumerate(elements) if el["type"] == t) for t in ELEMENT_TYPES}
+    return LayoutTemplate(
+        name=name,
+        background_color=data.get("background_color"),
+        elements=elements,
+        slots=MappingProxyType(slots),
+        slot_counts=MappingProxyType({t: len(idx) for t, idx in slots.items()}),
+    )
+
+
+class TemplateRegistry:
+    """
+    Every layouts_dir/<name>.json, loaded and validated up front. Raises
+    ValueError listing all problems if any template is invalid.
+    """
+
+    def __init__(self, layouts_dir):
+        self.layouts_dir = Path(layouts_dir)
+        templates = {}
+        problems = []
+        for path in sorted(self.layouts_dir.glob("*.json")):
+            data = json.loads(path.read_text())
+            errors = validate_template(data, path.stem)
+            if errors:
+                problems.extend(f"{path.name}: {e}" for e in errors)
+            else:
+                templates[path.stem] = build_template(data, path.stem)
+        if problems:
+            raise ValueError("Invalid layout templates:\n" + "\n".join(problems))
+        self._templates = MappingProxyType(templates)
+
+    def get(self, name):
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise ValueError(f"Layout template not found: {name}") from None
+
+    def names(self):
+        return list(self._templates)
+
+    def __contains__(self, name):
+        return name in self._templates
+
+    def __len__(self):
+        return len(self._templates)
+
+
+_REGISTRIES = {}
+
+
+def get_registry(config=None):
+    """
+    Process-wide registry per layouts dir.
+    """
+    layouts_dir = (config or get_config()).layouts_dir
+    if layouts_dir not in _REGISTRIES:
+        _REGISTRIES[layouts_dir] = TemplateRegistry(layouts_dir)
+    return _REGISTRIES[layouts_dir]
@@ -0,0 +1,226 @@
+"""
+Self-contained export of the XGBoost layout model.
+
+export_xgboost() flattens the trained multi:softprob tree ensemble into
+plain node arrays in one .npz (no pickle), and TreeEnsemble evaluates it
+with NumPy only. A worker then needs neither xgboost nor sklearn, and
+loading the model is a single np.load.
+
+    python -m layout_generator.tree_model     # export the pickles in layout_model_dir
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from runtime_config import get_config
+
+NPZ_FILE = "layout_generator.npz"
+# export_xgboost refuses to write a model whose probabilities differ more
+PARITY_TOLERANCE = 1e-5
+PARITY_SAMPLES = 2000
+
+
+def _floats(value):
+    # learner_model_param stores base_score as "5E-1" or, since xgboost 3, "[0E0,...]"
+    return np.array([float(v) for v in str(value).strip("[]").split(",")], dtype=np.float64)
+
+
+def flatten_booster(booster, best_iteration=None):
+    """
+    Node arrays for every tree predict_proba would use, from the booster's
+    JSON model. Children, like roots, are indices into the concatenated
+    node arrays; leaves have feature -1 and their value in `value`.
+    """
+    learner = json.loads(booster.save_raw("json"))["learner"]
+    objective = learner["objective"]["name"]
+    if objective not in ("multi:softprob", "multi:softmax"):
+        raise ValueError(f"Unsupported objective: {objective}")
+    gbm = learner["gradient_booster"]
+    if gbm["name"] != "gbtree":
+        raise ValueError(f"Unsupported booster: {gbm['name']}")
+    model = gbm["model"]
+    params = learner["learner_model_param"]
+    num_class = int(params["num_class"])
+
+    n_trees = len(model["trees"])
+    if best_iteration is not None:
+        per_round = num_class * int(model["gbtree_model_param"]["num_parallel_tree"])
+        n_trees = min(n_trees, (best_iteration + 1) * per_round)
+
+    feature, threshold, left, right, missing, value, roots = [], [], [], [], [], [], []
+    offset = 0
+    for tree in model["trees"][:n_trees]:
+        if int(tree["tree_param"].get("size_leaf_vector", 1)) > 1 or tree.get("categories_nodes"):
+            raise ValueError("Vector-leaf and categorical trees are not supported")
+        lc = np.asarray(tree["left_children"], dtype=np.int64)
+        rc = np.asarray(tree["right_children"], dtype=np.int64)
+        cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+        leaf = lc == -1
+
+        feature.append(np.where(leaf, -1, tree["split_indices"]).astype(np.int32))
+        threshold.append(np.where(leaf, 0, cond).astype(np.float32))
+        value.append(np.where(leaf, cond, 0).astype(np.float32))
+        # leaves point at themselves, so walking past one is a no-op
+        own = np.arange(len(lc)) + offset
+        left.append(np.where(leaf, own, lc + offset))
+        right.append(np.where(leaf, own, rc + offset))
+        default_left = np.asarray(tree["default_left"], dtype=bool)
+        missing.append(np.where(default_left, left[-1], right[-1]))
+        roots.append(offset)
+        offset += len(lc)
+
+    base_score = _floats(params["base_score"])
+    return {
+        "feature": np.concatenate(feature),
+        "threshold": np.concatenate(threshold),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "missing": np.concatenate(missing).astype(np.int32),
+        "value": np.concatenate(value),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "tree_class": np.asarray(model["tree_info"][:n_trees], dtype=np.int32),
+        "base_score": np.broadcast_to(base_score, (num_class,)).copy(),
+        "num_class": np.int32(num_class),
+        "feature_names": np.asarray(booster.feature_names or [], dtype=str),
+    }
+
+
+class TreeEnsemble:
+    """
+    NumPy evaluator for an exported model; predict_proba matches the
+    XGBoost classifier it was exported from.
+    """
+
+    def __init__(self, arrays):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.missing = arrays["missing"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.tree_class = arrays["tree_class"]
+        self.base_score = arrays["base_score"]
+        self.num_class = int(arrays["num_class"])
+        self.feature_names = [str(f) for f in arrays["feature_names"]]
+        self.classes_ = np.asarray(arrays["classes"]) if "classes" in arrays else np.arange(self.num_class)
+        # one-hot tree -> class, so summing leaves per class is one matmul
+        self._class_matrix = np.zeros((len(self.roots), self.num_class), dtype=np.float64)
+        self._class_matrix[np.arange(len(self.roots)), self.tree_class] = 1.0
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({k: data[k] for k in data.files})
+
+    def save(self, path):
+        arrays = {
+            "feature": self.feature, "threshold": self.threshold, "left": self.left,
+            "right": self.right, "missing": self.missing, "value": self.value,
+            "roots": self.roots, "tree_class": self.tree_class, "base_score": self.base_score,
+            "num_class": np.int32(self.num_class), "feature_names": np.asarray(self.feature_names, dtype=str),
+            "classes": np.asarray(self.classes_),
+        }
+        np.savez_compressed(path, **arrays)
+
+    def _matrix(self, X):
+        if hasattr(X, "columns") and self.feature_names:
+            X = X[self.feature_names]
+        return np.asarray(X, dtype=np.float32)
+
+    def predict_margin(self, X):
+        X = self._matrix(X)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        while True:
+            feat = self.feature[node]
+            inner = feat >= 0
+            if not inner.any():
+                break
+            fv = X[rows, np.maximum(feat, 0)]
+            nxt = np.where(fv < self.threshold[node], self.left[node], self.right[node])
+            nxt = np.where(np.isnan(fv), self.missing[node], nxt)
+            node = np.where(inner, nxt, node)
+        return self.base_score + self.value[node].astype(np.float64) @ self._class_matrix
+
+    def predict_proba(self, X):
+        margin = self.predict_margin(X)
+        margin -= margin.max(axis=1, keepdims=True)
+        exp = np.exp(margin)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+def _parity_sample(ensemble, n=PARITY_SAMPLES, seed=0):
+    """
+    Random rows spanning every split threshold of every feature, so both
+    sides of the splits get exercised, plus a few missing values.
+    """
+    rng = np.random.default_rng(seed)
+    n_features = len(ensemble.feature_names) or int(ensemble.feature.max()) + 1
+    X = np.zeros((n, n_features), dtype=np.float32)
+    for f in range(n_features):
+        thr = ensemble.threshold[ensemble.feature == f]
+        lo, hi = (thr.min(), thr.max()) if len(thr) else (0.0, 1.0)
+        span = max(hi - lo, 1.0)
+        X[:, f] = rng.uniform(lo - 0.1 * span, hi + 0.1 * span, n)
+    X[rng.random(X.shape) < 0.01] = np.nan
+    return X
+
+
+def export_xgboost(model, path, label_encoder=None, check_X=None, tolerance=PARITY_TOLERANCE):
+    """
+    Writes the XGBClassifier `model` to path (.npz) and returns the loaded
+    TreeEnsemble. Layout names come from label_encoder.classes_ when given.
+
+    Before writing, predict_proba of both models is compared on check_X (a
+    random sample across the split thresholds when not given); a difference
+    above tolerance raises ValueError.
+    """
+    best_iteration = getattr(model, "best_iteration", None)
+    arrays = flatten_booster(model.get_booster(), best_iteration)
+    if label_encoder is not None:
+        arrays["classes"] = np.asarray(label_encoder.classes_, dtype=str)
+    ensemble = TreeEnsemble(arrays)
+
+    if check_X is None:
+        check_X = _parity_sample(ensemble)
+        if ensemble.feature_names:
+            import pandas as pd
+            check_X = pd.DataFrame(check_X, columns=ensemble.feature_names)
+    diff = float(np.abs(model.predict_proba(check_X) - ensemble.predict_proba(check_X)).max())
+    if diff > tolerance:
+        raise ValueError(f"Exported model differs from XGBoost by {diff:.2e} (tolerance {tolerance:.0e})")
+    print(f"Parity check on {len(check_X)} rows: max |dp| = {diff:.2e}")
+
+    ensemble.save(path)
+    return ensemble
+
+
+def export_from_pickles(model_dir=None, out_path=None):
+    """
+    Exports the joblib pickles that LayoutPredictor loads to model_dir/NPZ_FILE
+    (or out_path).
+    """
+    import joblib
+
+    from layout_generator.layout_generator import LAYOUT_MODEL_FILE, LABEL_ENCODER_FILE
+
+    model_dir = Path(model_dir or get_config().layout_model_dir)
+    out_path = Path(out_path or model_dir / NPZ_FILE)
+    model = joblib.load(model_dir / LAYOUT_MODEL_FILE)
+    label_encoder = joblib.load(model_dir / LABEL_ENCODER_FILE)
+    export_xgboost(model, out_path, label_encoder)
+    print(f"Exported layout model to {out_path}")
+    return out_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export the XGBoost layout model to .npz")
+    parser.add_argument("--model-dir", type=Path, default=None)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+    export_from_pickles(args.model_dir, args.out)
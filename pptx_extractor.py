@@ -1,32 +1,60 @@
 
 """
 pptx_extractor.py
-Usage: python pptx_extractor.py input.pptx out_dir
+Usage: python pptx_extractor.py input.pptx out_dir [--workers N] [--manifest] [--incremental] [--stream]
+       python pptx_extractor.py --batch decks_dir_or_list.txt out_root [--workers N] [...]
+       add --no-cache to bypass the extraction result cache
 
 What it does:
 - Extracts text (paragraphs + runs) and run-level font properties
-- Extracts images (pictures) to out_dir/images/
+- Extracts images (pictures) to out_dir/images/, one file per unique blob
+  named by its sha1, so an image reused on many slides is stored once
 - Extracts tables to CSV files
 - Extracts slide notes
 - Produces per-slide JSON metadata with shape bbox (emu) and normalized coords
 - Flags "problematic" shapes (SmartArt, Chart, GraphicFrame w/o accessible image)
 - Saves XML snapshot for flagged shapes for debugging
 - Produces per-slide bbox CSV for quick use
+- Optionally (--manifest) writes all slides to one deck_manifest.jsonl instead
+  of the per-slide JSON / bbox CSV / notes files
+- Records a digest per slide so --incremental re-runs only redo changed slides
+- --stream keeps memory bounded on media-heavy decks by copying pictures
+  straight out of the zip instead of loading them into python-pptx
 """
 
+import os
 import sys
 import json
+import hashlib
+import shutil
+import tempfile
+import zipfile
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
 from pathlib import Path
 from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
 from lxml import etree
 from PIL import Image
 import io
 import csv
 
+from deck_loader import MANIFEST_NAME, manifest_line, slide_dir_for
+from runtime_config import get_config
+
 EMU_PER_INCH = 914400  # pptx EMU constant
 DPI = 96  # used only if you need px conversion; optional
 
+# Extraction result cache, keyed by the sha256 of the pptx
+CACHE_DIR = get_config().extract_cache_dir  # default, see RuntimeConfig
+CACHE_MAX_BYTES = 5 * 1024 ** 3
+# bump when the output format changes so entries of older extractors stop matching
+EXTRACT_VERSION = 2
+
 def emu_to_inches(emu):
     return emu / EMU_PER_INCH
 
@@ -42,6 +70,42 @@ def shape_xml_string(shape):
     el = shape.element
     return etree.tostring(el, pretty_print=True, encoding='unicode')
 
+# Namespaces / graphicData uris used to classify graphic frames structurally
+NS_P = "http://schemas.openxmlformats.org/presentationml/2006/main"
+NS_A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+GRAPHIC_FRAME_TAG = f"{{{NS_P}}}graphicFrame"
+GRAPHIC_DATA_TAG = f"{{{NS_A}}}graphicData"
+BLIP_TAG = f"{{{NS_A}}}blip"
+CHART_URIS = {
+    "http://schemas.openxmlformats.org/drawingml/2006/chart",
+    "http://schemas.microsoft.com/office/drawing/2014/chartex",
+}
+SMARTART_URI = "http://schemas.openxmlformats.org/drawingml/2006/diagram"
+TABLE_URI = "http://schemas.openxmlformats.org/drawingml/2006/table"
+
+def detect_problem(shape):
+    """
+    Classifies a shape by its element tag and graphicData@uri instead of
+    substring checks on its serialized XML.
+    Returns "chart_or_smartart", "graphic_frame_no_blip" or None.
+    """
+    el = shape.element
+    if el.tag != GRAPHIC_FRAME_TAG:
+        return None
+
+    graphic_data = el.find(f".//{GRAPHIC_DATA_TAG}")
+    uri = graphic_data.get("uri") if graphic_data is not None else None
+
+    if uri in CHART_URIS or uri == SMARTART_URI:
+        return "chart_or_smartart"
+    # tables are extracted to CSV, nothing to flag
+    if uri == TABLE_URI:
+        return None
+    # OLE objects etc. are usable if they carry a preview image (blip)
+    if next(el.iter(BLIP_TAG), None) is None:
+        return "graphic_frame_no_blip"
+    return None
+
 def ensure_dir(p: Path):
     p.mkdir(parents=True, exist_ok=True)
 
@@ -58,260 +122,765 @@ def save_image_blob(blob_bytes: bytes, outpath: Path):
         except Exception:
             return False
 
-def extract(pptx_path: Path, out_dir: Path):
-    ensure_dir(out_dir)
+def store_image(blob_bytes: bytes, ext, images_dir: Path):
+    """
+    Content-addressed image store: the file is named by the sha1 of the blob,
+    so repeated logos/photos are written (and later enhanced) only once.
+    Returns (path or None, digest).
+    """
+    digest = hashlib.sha1(blob_bytes).hexdigest()
+    img_path = images_dir / f"{digest}.{ext}"
+    if img_path.exists():
+        return img_path, digest
+
+    # write under a private name then rename, parallel workers may race on the same digest
+    tmp_path = images_dir / f".{digest}.{os.getpid()}.{ext}"
+    if not save_image_blob(blob_bytes, tmp_path):
+        return None, digest
+    os.replace(tmp_path, img_path)
+    return img_path, digest
+
+# Streaming mode: media members are left out of the package python-pptx loads
+# and copied straight from the original zip, so blobs never sit in memory
+MEDIA_PREFIX = "ppt/media/"
+STREAM_CHUNK = 1024 * 1024
+# normalise part extensions to what python-pptx's Image.ext reports
+EXT_ALIASES = {"jpeg": "jpg", "jpe": "jpg", "tif": "tiff"}
+
+def slim_package(pptx_path: Path, slim_path: Path):
+    """
+    Writes a copy of the pptx whose media members are empty, for python-pptx
+    to open in streaming mode. Returns slim_path.
+    """
+    with zipfile.ZipFile(pptx_path) as src, zipfile.ZipFile(slim_path, "w") as dst:
+        for info in src.infolist():
+            if info.filename.startswith(MEDIA_PREFIX):
+                dst.writestr(info, b"")
+                continue
+            with src.open(info) as fsrc, dst.open(info, "w") as fdst:
+                shutil.copyfileobj(fsrc, fdst, STREAM_CHUNK)
+    return slim_path
+
+def stream_image(media_zip: zipfile.ZipFile, member, ext, images_dir: Path):
+    """
+    store_image() for streaming mode: copies the zip member to disk in chunks,
+    hashing as it goes. Returns (path, digest).
+    """
+    h = hashlib.sha1()
+    tmp_path = images_dir / f".stream.{os.getpid()}.{ext}"
+    with media_zip.open(member) as src, tmp_path.open("wb") as dst:
+        for chunk in iter(lambda: src.read(STREAM_CHUNK), b""):
+            h.update(chunk)
+            dst.write(chunk)
+
+    digest = h.hexdigest()
+    img_path = images_dir / f"{digest}.{ext}"
+    if img_path.exists():
+        tmp_path.unlink()
+    else:
+        os.replace(tmp_path, img_path)
+    return img_path, digest
+
+def extract_slide(slide, si, out_dir: Path, slide_width, slide_height, manifest=False, media_zip=None):
+    """
+    Extracts one slide into out_dir/slide_XX/ and returns (index entry for
+    metadata.json, slide record). Shape indices are assigned in document order,
+    so the result does not depend on which process handled the slide.
+
+    manifest: skip the per-slide JSON / bbox CSV / notes / XML files, the
+    record goes into the deck manifest instead. Table CSVs are still written
+    since assembly embeds them from disk.
+    media_zip: the original pptx opened as a ZipFile when the slide comes from
+    a slim_package() copy; pictures are then streamed out of it.
+    """
     images_dir = out_dir / "images"
-    ensure_dir(images_dir)
-    metadata = {"source": str(pptx_path), "slides": []}
-
-    prs = Presentation(str(pptx_path))
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-
-    for si, slide in enumerate(prs.slides, start=1):
-        slide_meta = {
-            "slide_index": si - 1,
-            "slide_num": si,
-            "width_emu": slide_width,
-            "height_emu": slide_height,
-            "shapes": [],
+    slide_meta = {
+        "slide_index": si - 1,
+        "slide_num": si,
+        "width_emu": slide_width,
+        "height_emu": slide_height,
+        "shapes": [],
+        "notes": None,
+        "problem_shapes": []
+    }
+    slide_dir = out_dir / f"slide_{si:02d}"
+    # the slide dir only ever holds this function's output: drop what an earlier run left there
+    shutil.rmtree(slide_dir, ignore_errors=True)
+    ensure_dir(slide_dir)
+
+    # Save notes if present
+    notes_text = ""
+    try:
+        if slide.has_notes_slide:
+            notes_slide = slide.notes_slide
+            notes_text = "\n".join([p.text for p in notes_slide.notes_text_frame.paragraphs])
+            if not manifest:
+                (slide_dir / "notes.txt").write_text(notes_text, encoding="utf-8")
+            slide_meta["notes"] = notes_text
+    except Exception:
+        # Some slides may not have notes_slide attribute
+        slide_meta["notes"] = None
+
+    # Iterate shapes (including groups)
+    def handle_shape(shape, parent_index=None, depth=0):
+        sidx = len(slide_meta["shapes"]) + 1
+        base = {
+            "shape_index": sidx,
+            "type": str(shape.shape_type),
+            "is_group": shape.shape_type == MSO_SHAPE_TYPE.GROUP,
+            "left_emu": getattr(shape, "left", None),
+            "top_emu": getattr(shape, "top", None),
+            "width_emu": getattr(shape, "width", None),
+            "height_emu": getattr(shape, "height", None),
+            "left_norm": None,
+            "top_norm": None,
+            "width_norm": None,
+            "height_norm": None,
+            "has_text": False,
+            "text": None,
+            "paragraphs": [],
+            "has_table": False,
+            "table_rows": None,
+            "table_cols": None,
+            "has_image": False,
+            "image_path": None,
+            "image_sha1": None,
             "notes": None,
-            "problem_shapes": []
+            "xml_snapshot": None
         }
-        slide_dir = out_dir / f"slide_{si:02d}"
-        ensure_dir(slide_dir)
 
-        # Save notes if present
-        notes_text = ""
+        # normalize bbox
         try:
-            if slide.has_notes_slide:
-                notes_slide = slide.notes_slide
-                notes_text = "\n".join([p.text for p in notes_slide.notes_text_frame.paragraphs])
-                (slide_dir / "notes.txt").write_text(notes_text, encoding="utf-8")
-                slide_meta["notes"] = notes_text
+            l = base["left_emu"] or 0
+            t = base["top_emu"] or 0
+            w = base["width_emu"] or 0
+            h = base["height_emu"] or 0
+            base["left_norm"] = norm(l, slide_width)
+            base["top_norm"] = norm(t, slide_height)
+            base["width_norm"] = norm(w, slide_width)
+            base["height_norm"] = norm(h, slide_height)
         except Exception:
-            # Some slides may not have notes_slide attribute
-            slide_meta["notes"] = None
-
-        # Iterate shapes (including groups)
-        def handle_shape(shape, parent_index=None, depth=0):
-            sidx = len(slide_meta["shapes"]) + 1
-            base = {
-                "shape_index": sidx,
-                "type": str(shape.shape_type),
-                "is_group": shape.shape_type == MSO_SHAPE_TYPE.GROUP,
-                "left_emu": getattr(shape, "left", None),
-                "top_emu": getattr(shape, "top", None),
-                "width_emu": getattr(shape, "width", None),
-                "height_emu": getattr(shape, "height", None),
-                "left_norm": None,
-                "top_norm": None,
-                "width_norm": None,
-                "height_norm": None,
-                "has_text": False,
-                "text": None,
-                "paragraphs": [],
-                "has_table": False,
-                "table_rows": None,
-                "table_cols": None,
-                "has_image": False,
-                "image_path": None,
-                "notes": None,
-                "xml_snapshot": None
-            }
-
-            # normalize bbox
-            try:
-                l = base["left_emu"] or 0
-                t = base["top_emu"] or 0
-                w = base["width_emu"] or 0
-                h = base["height_emu"] or 0
-                base["left_norm"] = norm(l, slide_width)
-                base["top_norm"] = norm(t, slide_height)
-                base["width_norm"] = norm(w, slide_width)
-                base["height_norm"] = norm(h, slide_height)
-            except Exception:
-                pass
+            pass
 
-            # Text extraction
-            try:
-                if getattr(shape, "has_text_frame", False):
-                    base["has_text"] = True
-                    base["text"] = shape.text  # flattened text
-                    paras = []
-                    for p in shape.text_frame.paragraphs:
-                        runs = []
-                        for r in p.runs:
-                            font = r.font
-                            run_meta = {
-                                "text": r.text,
-                                "bold": bool(font.bold) if font is not None else None,
-                                "italic": bool(font.italic) if font is not None else None,
-                                "underline": bool(font.underline) if font is not None else None,
-                                "font_name": font.name if font is not None else None,
-                                "font_size_pt": font.size.pt if (font is not None and font.size is not None) else None,
-                                "color_rgb": None
-                            }
-                            # color may be complicated; best-effort
-                            try:
-                                if font.color and font.color.rgb:
-                                    run_meta["color_rgb"] = str(font.color.rgb)
-                            except Exception:
-                                pass
-                            runs.append(run_meta)
-                        is_bullet = False
+        # Text extraction
+        try:
+            if getattr(shape, "has_text_frame", False):
+                base["has_text"] = True
+                base["text"] = shape.text  # flattened text
+                paras = []
+                for p in shape.text_frame.paragraphs:
+                    runs = []
+                    for r in p.runs:
+                        font = r.font
+                        run_meta = {
+                            "text": r.text,
+                            "bold": bool(font.bold) if font is not None else None,
+                            "italic": bool(font.italic) if font is not None else None,
+                            "underline": bool(font.underline) if font is not None else None,
+                            "font_name": font.name if font is not None else None,
+                            "font_size_pt": font.size.pt if (font is not None and font.size is not None) else None,
+                            "color_rgb": None
+                        }
+                        # color may be complicated; best-effort
                         try:
-                            if p.level is not None:
-                                # python-pptx marks bullet via `p._p.pPr.bu*`
-                                pPr = p._p.pPr
-                                if pPr is not None:
-        # Search for bullet character or auto-numbering
-                                    bu_char = pPr.find(".//a:buChar", namespaces=p._p.nsmap)
-                                    bu_none = pPr.find(".//a:buNone", namespaces=p._p.nsmap)
-        # It's a bullet if buChar exists and buNone does NOT exist
-                                    if bu_char is not None and bu_none is None:
-                                        is_bullet = True
-                                    elif pPr.find(".//a:buAutoNum", namespaces=p._p.nsmap) is not None:
-                                        is_bullet = True
+                            if font.color and font.color.rgb:
+                                run_meta["color_rgb"] = str(font.color.rgb)
                         except Exception:
                             pass
-                            
-                        paras.append({
-                            "level": p.level,
-                            "is_bullet": is_bullet,
-                            "runs": runs
-                        })
-
-                    base["paragraphs"] = paras
-            except Exception:
-                # fallback: include XML snapshot to debug
-                base["xml_snapshot"] = shape_xml_string(shape)
+                        runs.append(run_meta)
+                    is_bullet = False
+                    try:
+                        if p.level is not None:
+                            # python-pptx marks bullet via `p._p.pPr.bu*`
+                            pPr = p._p.pPr
+                            if pPr is not None:
+    # Search for bullet character or auto-numbering
+                                bu_char = pPr.find(".//a:buChar", namespaces=p._p.nsmap)
+                                bu_none = pPr.find(".//a:buNone", namespaces=p._p.nsmap)
+    # It's a bullet if buChar exists and buNone does NOT exist
+                                if bu_char is not None and bu_none is None:
+                                    is_bullet = True
+                                elif pPr.find(".//a:buAutoNum", namespaces=p._p.nsmap) is not None:
+                                    is_bullet = True
+                    except Exception:
+                        pass
+                        
+                    paras.append({
+                        "level": p.level,
+                        "is_bullet": is_bullet,
+                        "runs": runs
+                    })
+
+                base["paragraphs"] = paras
+        except Exception:
+            # fallback: include XML snapshot to debug
+            base["xml_snapshot"] = shape_xml_string(shape)
 
-            # Table extraction
-            try:
-                if getattr(shape, "has_table", False):
-                    tbl = shape.table
-                    base["has_table"] = True
-                    base["table_rows"] = len(tbl.rows)
-                    base["table_cols"] = len(tbl.columns)
-                    # dump CSV
-                    csv_path = slide_dir / f"shape_{sidx}_table.csv"
-                    with csv_path.open("w", encoding="utf-8", newline="") as cf:
-                        writer = csv.writer(cf)
-                        for r in range(len(tbl.rows)):
-                            rowvals = []
-                            for c in range(len(tbl.columns)):
-                                rowvals.append(tbl.cell(r, c).text.replace("\n", " ").strip())
-                            writer.writerow(rowvals)
-                    base["table_csv"] = str(csv_path.relative_to(out_dir))
-            except Exception:
-                base["has_table"] = False
+        # Table extraction
+        try:
+            if getattr(shape, "has_table", False):
+                tbl = shape.table
+                base["has_table"] = True
+                base["table_rows"] = len(tbl.rows)
+                base["table_cols"] = len(tbl.columns)
+                # dump CSV
+                csv_path = slide_dir / f"shape_{sidx}_table.csv"
+                with csv_path.open("w", encoding="utf-8", newline="") as cf:
+                    writer = csv.writer(cf)
+                    for r in range(len(tbl.rows)):
+                        rowvals = []
+                        for c in range(len(tbl.columns)):
+                            rowvals.append(tbl.cell(r, c).text.replace("\n", " ").strip())
+                        writer.writerow(rowvals)
+                base["table_csv"] = str(csv_path.relative_to(out_dir))
+        except Exception:
+            base["has_table"] = False
 
-            # Image extraction
-            try:
+        # Image extraction
+        try:
+            if media_zip is not None:
+                # streaming: resolve the media part by name, never touch its (stubbed) blob
+                blip_rId = getattr(shape.element, "blip_rId", None)
+                if blip_rId is not None:
+                    partname = shape.part.related_part(blip_rId).partname
+                    ext = partname.ext.lower()
+                    ext = EXT_ALIASES.get(ext, ext)
+                    base["has_image"] = True
+                    img_path, digest = stream_image(media_zip, partname[1:], ext, images_dir)
+                    base["image_sha1"] = digest
+                    base["image_path"] = str(img_path.relative_to(out_dir))
+            else:
                 # Preferred: shape.image (works for Picture shapes)
                 img = getattr(shape, "image", None)
                 if img is not None:
                     base["has_image"] = True
-                    ext = img.ext
-                    blob = img.blob
-                    img_name = f"slide{si:02d}_shape{sidx}_img.{ext}"
-                    img_path = images_dir / img_name
-                    saved = save_image_blob(blob, img_path)
-                    if saved:
+                    img_path, digest = store_image(img.blob, img.ext, images_dir)
+                    base["image_sha1"] = digest
+                    if img_path is not None:
                         base["image_path"] = str(img_path.relative_to(out_dir))
-            except Exception:
-                # for grouped images or complex cases, fallback to xml snapshot flag
-                pass
+        except Exception:
+            # for grouped images or complex cases, fallback to xml snapshot flag
+            pass
+
+        # Flag problematic shapes: charts, smartart, graphicFrame w/o accessible image
+        try:
+            problem = detect_problem(shape)
+            if problem:
+                # only flagged shapes pay for serializing their XML
+                base["xml_snapshot"] = shape_xml_string(shape)
+                base["problem"] = problem
+                slide_meta["problem_shapes"].append(sidx)
+        except Exception:
+            # ignore
+            pass
+
+        slide_meta["shapes"].append(base)
 
-            # Flag problematic shapes: charts, smartart, graphicFrame w/o accessible image
+        # If group, recurse
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
             try:
-                tag = shape.element.tag.lower()
-                # Many charts/smartart are graphicFrame (a:graphicFrame). Decide by checking for c:chart or <p:graphicFrame> with chart namespace
-                xml_str = shape_xml_string(shape)
-                # heuristics
-                if ("chart" in xml_str.lower()) or ("graphicdata" in xml_str.lower() and "chart" in xml_str.lower()) or ("smartart" in xml_str.lower()):
-                    # mark as problem (we may want to export as image instead)
-                    base["xml_snapshot"] = xml_str
-                    base["problem"] = "chart_or_smartart"
-                    slide_meta["problem_shapes"].append(sidx)
-                # a graphicFrame that doesn't have an accessible image: flag
-                elif shape.shape_type == MSO_SHAPE_TYPE.GRAPHICAL_FRAME or ("graphicFrame" in xml_str and base["has_image"] is False):
-                    # check if there's an embedded image (blip)
-                    if "blip" not in xml_str.lower():
-                        base["xml_snapshot"] = xml_str
-                        base["problem"] = "graphic_frame_no_blip"
-                        slide_meta["problem_shapes"].append(sidx)
+                for sub in shape.shapes:
+                    handle_shape(sub, parent_index=sidx, depth=depth+1)
             except Exception:
-                # ignore
                 pass
 
-            slide_meta["shapes"].append(base)
-
-            # If group, recurse
-            if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
-                try:
-                    for sub in shape.shapes:
-                        handle_shape(sub, parent_index=sidx, depth=depth+1)
-                except Exception:
-                    pass
-
-        # iterate top-level shapes
-        for shape in slide.shapes:
-            handle_shape(shape)
-
-        # Save per-slide bbox CSV
-        bbox_csv = slide_dir / f"slide_{si:02d}_bboxes.csv"
-        with bbox_csv.open("w", encoding="utf-8", newline="") as bf:
-            writer = csv.writer(bf)
-            writer.writerow(["shape_index","left_emu","top_emu","width_emu","height_emu","left_norm","top_norm","width_norm","height_norm","has_text","has_table","has_image","image_path","problem"])
-            for s in slide_meta["shapes"]:
-                writer.writerow([
-                    s.get("shape_index"),
-                    s.get("left_emu"),
-                    s.get("top_emu"),
-                    s.get("width_emu"),
-                    s.get("height_emu"),
-                    s.get("left_norm"),
-                    s.get("top_norm"),
-                    s.get("width_norm"),
-                    s.get("height_norm"),
-                    s.get("has_text"),
-                    s.get("has_table"),
-                    s.get("has_image"),
-                    s.get("image_path"),
-                    s.get("problem", "")
-                ])
-
-        # Save any XML snapshots for problematic shapes
-        if slide_meta["problem_shapes"]:
-            ps_dir = slide_dir / "problem_shapes_xml"
-            ensure_dir(ps_dir)
-            for s in slide_meta["shapes"]:
-                if s.get("problem"):
-                    idx = s["shape_index"]
-                    fname = ps_dir / f"shape_{idx}_xml.xml"
-                    xmltxt = s.get("xml_snapshot", "<no-xml>")
-                    fname.write_text(xmltxt, encoding="utf-8")
-
-        # Save slide json
-        slide_json_path = slide_dir / f"slide_{si:02d}_metadata.json"
-        slide_json_path.write_text(json.dumps(slide_meta, ensure_ascii=False, indent=2), encoding="utf-8")
-
-        metadata["slides"].append({"slide_num": si, "meta_path": str(slide_json_path.relative_to(out_dir))})
+    # iterate top-level shapes
+    for shape in slide.shapes:
+        handle_shape(shape)
+
+    if manifest:
+        return {"slide_num": si}, slide_meta
+
+    # Save per-slide bbox CSV
+    bbox_csv = slide_dir / f"slide_{si:02d}_bboxes.csv"
+    with bbox_csv.open("w", encoding="utf-8", newline="") as bf:
+        writer = csv.writer(bf)
+        writer.writerow(["shape_index","left_emu","top_emu","width_emu","height_emu","left_norm","top_norm","width_norm","height_norm","has_text","has_table","has_image","image_path","problem"])
+        for s in slide_meta["shapes"]:
+            writer.writerow([
+                s.get("shape_index"),
+                s.get("left_emu"),
+                s.get("top_emu"),
+                s.get("width_emu"),
+                s.get("height_emu"),
+                s.get("left_norm"),
+                s.get("top_norm"),
+                s.get("width_norm"),
+                s.get("height_norm"),
+                s.get("has_text"),
+                s.get("has_table"),
+                s.get("has_image"),
+                s.get("image_path"),
+                s.get("problem", "")
+            ])
+
+    # Save any XML snapshots for problematic shapes
+    if slide_meta["problem_shapes"]:
+        ps_dir = slide_dir / "problem_shapes_xml"
+        ensure_dir(ps_dir)
+        for s in slide_meta["shapes"]:
+            if s.get("problem"):
+                idx = s["shape_index"]
+                fname = ps_dir / f"shape_{idx}_xml.xml"
+                xmltxt = s.get("xml_snapshot", "<no-xml>")
+                fname.write_text(xmltxt, encoding="utf-8")
+
+    # Save slide json
+    slide_json_path = slide_dir / f"slide_{si:02d}_metadata.json"
+    slide_json_path.write_text(json.dumps(slide_meta, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    return {"slide_num": si, "meta_path": str(slide_json_path.relative_to(out_dir))}, slide_meta
+
+# Per-process state for parallel extraction: each worker opens the package once
+_WORKER_PRS = None
+_WORKER_MEDIA_ZIP = None
+
+def _init_worker(pptx_path, media_source=None):
+    global _WORKER_PRS, _WORKER_MEDIA_ZIP
+    _WORKER_PRS = Presentation(str(pptx_path))
+    if media_source is not None:
+        _WORKER_MEDIA_ZIP = zipfile.ZipFile(media_source)
+
+def _extract_slide_worker(si, out_dir, manifest):
+    prs = _WORKER_PRS
+    slide = prs.slides[si - 1]
+    return extract_slide(slide, si, out_dir, prs.slide_width, prs.slide_height, manifest, _WORKER_MEDIA_ZIP)
+
+def _hash_part(h, part, zip_index):
+    # by the CRC/size the zip already stores, so the part is never read
+    h.update(str(part.partname).encode())
+    member = zip_index.get(str(part.partname)[1:])
+    if member is not None:
+        h.update(f"{member.CRC}:{member.file_size}".encode())
+    else:
+        h.update(part.blob)
+
+def slide_digest(slide, zip_index):
+    """
+    Digest of the slide XML part plus the parts it pulls in (media, charts,
+    notes, and the layout and master its placeholders inherit geometry
+    from). Related parts are hashed by the CRC/size the zip already stores,
+    so media never has to be read.
+    """
+    h = hashlib.sha1()
+    h.update(slide.part.blob)
+    for rel in sorted(slide.part.rels.values(), key=lambda r: r.rId):
+        h.update(rel.reltype.encode())
+        if rel.is_external:
+            h.update(rel.target_ref.encode())
+            continue
+        _hash_part(h, rel.target_part, zip_index)
+        if rel.reltype == RT.SLIDE_LAYOUT:
+            _hash_part(h, rel.target_part.part_related_by(RT.SLIDE_MASTER), zip_index)
+    return h.hexdigest()
+
+def _load_previous(out_dir: Path, manifest):
+    """
+    Returns ({slide_num: index entry}, {slide_num: manifest line}) from an
+    earlier run into out_dir, or empty dicts if there is nothing comparable.
+    """
+    meta_path = out_dir / "metadata.json"
+    if not meta_path.exists():
+        return {}, {}
+    try:
+        previous = json.loads(meta_path.read_text(encoding="utf-8"))
+    except ValueError:
+        return {}, {}
+    # output layout changed (files <-> manifest): nothing can be reused
+    if bool(previous.get("manifest")) != bool(manifest):
+        return {}, {}
+
+    entries = {e["slide_num"]: e for e in previous.get("slides", []) if e.get("digest")}
+    records = {}
+    manifest_path = out_dir / MANIFEST_NAME
+    if manifest and manifest_path.exists():
+        with manifest_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    records[json.loads(line)["slide_num"]] = line
+    return entries, records
+
+def iter_extract(pptx_path: Path, out_dir: Path, workers=1, manifest=False, incremental=False, stream=False):
+    """
+    Generator form of extract(): writes the same output tree but yields each
+    slide record as soon as it is done instead of returning at the end, so a
+    caller can process a deck slide by slide. Its return value (StopIteration)
+    is the metadata dict written to metadata.json.
+
+    stream: bounded-memory mode. python-pptx opens a slim copy of the deck with
+    empty media members and pictures are streamed from the original zip, so
+    peak memory no longer grows with the media in the deck.
+    """
+    pptx_path = Path(pptx_path)
+    out_dir = Path(out_dir)
+    ensure_dir(out_dir)
+    images_dir = out_dir / "images"
+    ensure_dir(images_dir)
+    metadata = {"source": str(pptx_path), "slides": []}
+
+    media_zip = zipfile.ZipFile(pptx_path)
+    zip_index = {info.filename: info for info in media_zip.infolist()}
+    tmp_dir = None
+    prs_path = pptx_path
+    if stream:
+        tmp_dir = tempfile.TemporaryDirectory(prefix="pptx_slim_")
+        prs_path = slim_package(pptx_path, Path(tmp_dir.name) / pptx_path.name)
+
+    manifest_file = None
+    try:
+        prs = Presentation(str(prs_path))
+        slide_width = prs.slide_width
+        slide_height = prs.slide_height
+        num_slides = len(prs.slides)
+        digests = [slide_digest(slide, zip_index) for slide in prs.slides]
+
+        reuse = {}
+        if incremental:
+            prev_entries, prev_records = _load_previous(out_dir, manifest)
+            for si, digest in enumerate(digests, start=1):
+                entry = prev_entries.get(si)
+                if entry is None or entry["digest"] != digest:
+                    continue
+                if manifest and si in prev_records:
+                    reuse[si] = (entry, prev_records[si])
+                elif not manifest and (out_dir / entry["meta_path"]).exists():
+                    reuse[si] = (entry, None)
+            del prev_records
+
+            # drop outputs of slides that changed or no longer exist
+            for slide_dir in out_dir.glob("slide_*"):
+                num = slide_dir.name[len("slide_"):]
+                if slide_dir.is_dir() and num.isdigit() and int(num) not in reuse:
+                    shutil.rmtree(slide_dir, ignore_errors=True)
+
+        dirty = [si for si in range(1, num_slides + 1) if si not in reuse]
+        metadata["dirty_slides"] = dirty
+
+        if manifest:
+            metadata["manifest"] = MANIFEST_NAME
+            # previous records were read into memory above, safe to truncate
+            manifest_file = (out_dir / MANIFEST_NAME).open("w", encoding="utf-8")
+
+        slide_media = media_zip if stream else None
+        if workers and workers > 1 and len(dirty) > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=min(workers, len(dirty)),
+                initializer=_init_worker,
+                initargs=(str(prs_path), str(pptx_path) if stream else None)
+            )
+            # map() yields in submission order, so the index stays sorted by slide
+            dirty_results = pool.map(_extract_slide_worker, dirty, repeat(out_dir), repeat(manifest))
+        else:
+            pool = None
+            dirty_results = (
+                extract_slide(prs.slides[si - 1], si, out_dir, slide_width, slide_height, manifest, slide_media)
+                for si in dirty
+            )
+
+        try:
+            for si in range(1, num_slides + 1):
+                if si in reuse:
+                    entry, line = reuse.pop(si)
+                    if manifest:
+                        manifest_file.write(line)
+                        record = json.loads(line)
+                    else:
+                        record = json.loads((out_dir / entry["meta_path"]).read_text(encoding="utf-8"))
+                else:
+                    entry, record = next(dirty_results)
+                    if manifest:
+                        manifest_file.write(manifest_line(record))
+                entry["digest"] = digests[si - 1]
+                metadata["slides"].append(entry)
+                yield record
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    finally:
+        if manifest_file is not None:
+            manifest_file.close()
+        media_zip.close()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
 
     # Save global metadata
     (out_dir / "metadata.json").write_text(json.dumps(metadata, ensure_ascii=False, indent=2), encoding="utf-8")
+    if incremental:
+        print(f"Re-extracted {len(dirty)} of {num_slides} slides: {dirty}")
     print(f"Extraction complete. Output written to: {out_dir}")
+    return metadata
+
+def file_digest(path: Path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(STREAM_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _materialize(src_dir: Path, dst_dir: Path, files=None):
+    """
+    Copies files (paths relative to src_dir; default: everything under it).
+    Files under images/ are hardlinked (falling back to a copy across
+    filesystems): nothing downstream edits them in place. JSON/CSV files are
+    real copies because changing_path rewrites them in place. Copies are
+    renamed into place, so an interrupted call leaves no partial file behind
+    (store_image would take one for the finished image).
+    """
+    if files is None:
+        files = [p.relative_to(src_dir) for p in src_dir.rglob("*") if p.is_file()]
+    for rel in files:
+        path = src_dir / rel
+        target = dst_dir / rel
+        ensure_dir(target.parent)
+        if target.exists() or target.is_symlink():
+            target.unlink()
+        if rel.parts[0] == "images":
+            try:
+                os.link(path, target)
+                continue
+            except OSError:
+                pass
+        tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        try:
+            shutil.copy2(path, tmp_path)
+            os.replace(tmp_path, target)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+def _written_files(out_dir: Path, metadata, image_paths):
+    """
+    The files one extraction wrote into out_dir, relative to it: metadata.json,
+    the manifest, the slide_XX/ dirs it lists and the images their shapes
+    reference. Anything else there (images_final/, backgrounds/, slides or
+    images of an earlier deck) belongs to other stages or runs.
+    """
+    files = {Path("metadata.json")}
+    if metadata.get("manifest"):
+        files.add(Path(metadata["manifest"]))
+    for entry in metadata["slides"]:
+        slide_dir = slide_dir_for(out_dir, entry["slide_num"])
+        files.update(p.relative_to(out_dir) for p in slide_dir.rglob("*") if p.is_file())
+    files.update(Path(p) for p in image_paths)
+    return sorted(files)
+
+def _dir_size(path: Path):
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+def _evict_cache(cache_dir: Path, max_bytes):
+    # LRU by entry mtime, which is bumped on every hit
+    entries = {}
+    for p in cache_dir.iterdir():
+        if p.name.startswith(".") or not p.is_dir():
+            continue
+        try:
+            entries[p] = (p.stat().st_mtime, _dir_size(p))
+        except FileNotFoundError:
+            continue  # evicted by another job meanwhile
+    total = sum(size for _, size in entries.values())
+    for entry in sorted(entries, key=lambda p: entries[p][0]):
+        if total <= max_bytes:
+            break
+        # rename first: a job reading the entry then fails outright instead
+        # of copying whatever rmtree has not reached yet
+        doomed = cache_dir / f".evict_{entry.name}_{os.getpid()}"
+        try:
+            os.rename(entry, doomed)
+        except OSError:
+            continue
+        shutil.rmtree(doomed, ignore_errors=True)
+        total -= entries[entry][1]
+
+def extract(pptx_path: Path, out_dir: Path, workers=1, manifest=False, incremental=False, stream=False,
+            use_cache=True, cache_dir=CACHE_DIR, cache_max_bytes=CACHE_MAX_BYTES):
+    """
+    workers: number of processes to fan slides out to. 1 keeps the serial path.
+    manifest: write every slide into one deck_manifest.jsonl (read it back with
+    deck_loader) instead of per-slide JSON, bbox CSV and notes files.
+    incremental: reuse the outputs of slides whose digest matches the previous
+    run into out_dir and only re-extract the rest. The re-extracted slide
+    numbers are recorded as metadata["dirty_slides"] for downstream stages.
+    stream: bounded-memory mode, see iter_extract().
+    use_cache: look the deck up by content hash in cache_dir and materialize a
+    previous result instead of parsing it again. Only the extractor's own
+    output is cached, and on a hit dirty_slides lists the slides that differ
+    from what out_dir held before (every slide unless incremental). An entry
+    another job evicts while it is being copied counts as a miss. The cache
+    is trimmed to cache_max_bytes, least recently used entries first.
+    Returns the metadata dict written to metadata.json.
+    """
+    pptx_path = Path(pptx_path)
+    out_dir = Path(out_dir)
+
+    entry = None
+    if use_cache:
+        cache_dir = Path(cache_dir)
+        ensure_dir(cache_dir)
+        # the output layout depends on the extractor version and manifest mode
+        key = f"{file_digest(pptx_path)}-v{EXTRACT_VERSION}-{'manifest' if manifest else 'files'}"
+        entry = cache_dir / key
+        meta_path = out_dir / "metadata.json"
+        metadata = None
+        if (entry / "metadata.json").exists():
+            ensure_dir(out_dir)
+            previous = _load_previous(out_dir, manifest)[0] if incremental else {}
+            try:
+                _materialize(entry, out_dir)
+                os.utime(entry)
+                metadata = json.loads(meta_path.read_text(encoding="utf-8"))
+            except OSError as e:
+                # evicted by another job while copying: out_dir now mixes two
+                # runs, so drop its metadata and let incremental reuse nothing
+                print(f"Extraction cache entry {key[:12]} went away ({e}), extracting instead")
+                meta_path.unlink(missing_ok=True)
+        if metadata is not None:
+            metadata["source"] = str(pptx_path)
+            # dirty_slides is relative to what out_dir held before, not to the cached run
+            metadata["dirty_slides"] = [
+                e["slide_num"] for e in metadata["slides"]
+                if previous.get(e["slide_num"], {}).get("digest") != e.get("digest")
+            ]
+            meta_path.write_text(json.dumps(metadata, ensure_ascii=False, indent=2), encoding="utf-8")
+            print(f"Extraction cache hit ({key[:12]}). Output written to: {out_dir}")
+            return metadata
+
+    records = iter_extract(pptx_path, out_dir, workers, manifest, incremental, stream)
+    image_paths = set()
+    while True:
+        try:
+            record = next(records)
+        except StopIteration as done:
+            metadata = done.value
+            break
+        image_paths.update(s["image_path"] for s in record["shapes"] if s.get("image_path"))
+
+    if entry is not None:
+        # build the entry beside the cache then rename, concurrent jobs may store the same deck
+        tmp_entry = Path(tempfile.mkdtemp(prefix=".tmp_", dir=cache_dir))
+        _materialize(out_dir, tmp_entry, _written_files(out_dir, metadata, image_paths))
+        try:
+            os.replace(tmp_entry, entry)
+        except OSError:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+        _evict_cache(cache_dir, cache_max_bytes)
+
+    return metadata
+
+def list_decks(source):
+    """
+    source: a directory (every *.pptx in it, recursively) or a text manifest
+    with one pptx path per line (blank lines and # comments ignored).
+    """
+    source = Path(source)
+    if source.is_dir():
+        return sorted(source.rglob("*.pptx"))
+    decks = []
+    for line in source.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            decks.append(Path(line))
+    return decks
+
+def _deck_out_dirs(decks, out_root: Path):
+    # one output tree per deck, named after the file; suffix clashing stems
+    out_dirs = {}
+    used = set()
+    for deck in decks:
+        name = deck.stem
+        n = 2
+        while name in used:
+            name = f"{deck.stem}_{n}"
+            n += 1
+        used.add(name)
+        out_dirs[deck] = out_root / name
+    return out_dirs
+
+def _extract_deck(pptx_path, out_dir, extract_kwargs):
+    start = time.perf_counter()
+    status = {"deck": str(pptx_path), "out_dir": str(out_dir)}
+    try:
+        metadata = extract(pptx_path, out_dir, **extract_kwargs)
+        status["status"] = "ok"
+        status["num_slides"] = len(metadata["slides"])
+    except Exception as e:
+        status["status"] = "failed"
+        status["error"] = f"{type(e).__name__}: {e}"
+    status["seconds"] = round(time.perf_counter() - start, 3)
+    return status
+
+def extract_batch(source, out_root: Path, workers=None, **extract_kwargs):
+    """
+    Extracts many decks through one long-lived process pool, so python and
+    python-pptx imports are paid once per worker rather than once per deck.
+    Writes out_root/<deck>/ trees plus out_root/batch_summary.json with
+    per-deck timing and status. A corrupt deck is recorded as failed and the
+    rest of the batch carries on; decks caught in a pool that died (e.g. a
+    worker crashed) are retried one at a time to pin down the culprit.
+    extract_kwargs are passed to extract() for every deck.
+    """
+    out_root = Path(out_root)
+    ensure_dir(out_root)
+    decks = list_decks(source)
+    out_dirs = _deck_out_dirs(decks, out_root)
+    results = {}
+    batch_start = time.perf_counter()
+
+    retry = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_extract_deck, deck, out_dirs[deck], extract_kwargs): deck
+            for deck in decks
+        }
+        for fut in as_completed(futures):
+            deck = futures[fut]
+            try:
+                results[deck] = fut.result()
+            except BrokenProcessPool:
+                retry.append(deck)
+
+    # isolate decks that were in flight when a worker died
+    pool = None
+    for deck in retry:
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=1)
+        try:
+            results[deck] = pool.submit(_extract_deck, deck, out_dirs[deck], extract_kwargs).result()
+        except BrokenProcessPool:
+            results[deck] = {
+                "deck": str(deck),
+                "out_dir": str(out_dirs[deck]),
+                "status": "failed",
+                "error": "worker process died",
+            }
+            pool.shutdown(wait=False)
+            pool = None
+    if pool is not None:
+        pool.shutdown()
+
+    summary = {
+        "total_seconds": round(time.perf_counter() - batch_start, 3),
+        "ok": sum(1 for r in results.values() if r["status"] == "ok"),
+        "failed": sum(1 for r in results.values() if r["status"] != "ok"),
+        "decks": [results[deck] for deck in decks],
+    }
+    (out_root / "batch_summary.json").write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Batch complete: {summary['ok']} ok, {summary['failed']} failed. Summary: {out_root / 'batch_summary.json'}")
+    return summary
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python pptx_extractor.py input.pptx out_dir")
-        sys.exit(1)
-    pptx_path = Path(sys.argv[1])
-    out_dir = Path(sys.argv[2])
-    extract(pptx_path, out_dir)
-
-
-
-
+    parser = argparse.ArgumentParser(description="Extract text, images, tables and notes from a pptx")
+    parser.add_argument("pptx_path", type=Path, help="input pptx, or with --batch a folder / list file of decks")
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--batch", action="store_true", help="extract every deck in pptx_path into out_dir/<deck>/")
+    parser.add_argument("--workers", type=int, default=1, help="process pool size (1 = serial); with --batch, decks in parallel")
+    parser.add_argument("--manifest", action="store_true", help="write a single deck_manifest.jsonl instead of per-slide files")
+    parser.add_argument("--incremental", action="store_true", help="only re-extract slides that changed since the last run into out_dir")
+    parser.add_argument("--stream", action="store_true", help="bounded-memory mode: stream media out of the zip instead of loading it")
+    parser.add_argument("--no-cache", action="store_true", help="always re-parse, ignore the extraction result cache")
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR)
+    args = parser.parse_args()
+    options = dict(manifest=args.manifest, incremental=args.incremental, stream=args.stream,
+                   use_cache=not args.no_cache, cache_dir=args.cache_dir)
+    if args.batch:
+        summary = extract_batch(args.pptx_path, args.out_dir, workers=args.workers, **options)
+        sys.exit(1 if summary["failed"] else 0)
+    extract(args.pptx_path, args.out_dir, workers=args.workers, **options)
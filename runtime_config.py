@@ -0,0 +1,116 @@
+"""
+Runtime paths for one SlideRevamp job.
+
+Everything that used to hard-code /kaggle/working or /kaggle/input takes a
+RuntimeConfig (or falls back to the process default from get_config()), so
+model weights and the caches can be shared while every job gets its own
+working and scratch directories:
+
+    config = get_config().for_job("deck-42")
+    process_image(img, config=config)
+    assemble_slide(prs, slide_json, bg_path, config=config)
+
+The process default reads SLIDEREVAMP_* environment variables (see ENV_VARS),
+e.g. SLIDEREVAMP_SCRATCH_DIR=/nvme/scratch; unset ones keep the Kaggle paths.
+"""
+
+import os
+from dataclasses import dataclass, field, fields, replace
+from pathlib import Path
+
+KAGGLE_WORKING = Path("/kaggle/working")
+
+ENV_VARS = {
+    "working_dir": "SLIDEREVAMP_WORKING_DIR",
+    "real_esrgan_dir": "SLIDEREVAMP_REAL_ESRGAN_DIR",
+    "u2net_dir": "SLIDEREVAMP_U2NET_DIR",
+    "layout_model_dir": "SLIDEREVAMP_LAYOUT_MODEL_DIR",
+    "layouts_dir": "SLIDEREVAMP_LAYOUTS_DIR",
+    "cache_dir": "SLIDEREVAMP_CACHE_DIR",
+    "scratch_dir": "SLIDEREVAMP_SCRATCH_DIR",
+    "job_id": "SLIDEREVAMP_JOB_ID",
+    "layout_backend": "SLIDEREVAMP_LAYOUT_BACKEND",
+}
+# fields that are not paths
+PLAIN_FIELDS = ("job_id", "layout_backend")
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    # per-job outputs (outputs/, outputs/images_final/ live under it)
+    working_dir: Path = KAGGLE_WORKING
+    # cloned model repos and weights, shared read-only between jobs
+    real_esrgan_dir: Path = KAGGLE_WORKING / "Real-ESRGAN"
+    u2net_dir: Path = KAGGLE_WORKING / "U-2-Net"
+    layout_model_dir: Path = Path("/kaggle/input/weights-for-layout-generator")
+    layouts_dir: Path = KAGGLE_WORKING / "SlideRevamp" / "layouts"
+    # shared between jobs; entries are written with tmp + rename
+    cache_dir: Path = field(default_factory=lambda: Path.home() / ".cache" / "sliderevamp")
+    # per-job throwaway files, put it on fast local disk
+    scratch_dir: Path = KAGGLE_WORKING / "scratch"
+    job_id: str = None
+    # layout predictor, see layout_generator.get_predictor
+    layout_backend: str = "auto"
+
+    def __post_init__(self):
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if f.name not in PLAIN_FIELDS and not isinstance(value, Path):
+                object.__setattr__(self, f.name, Path(value))
+
+    @classmethod
+    def from_env(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        return cls(**{name: environ[var] for name, var in ENV_VARS.items() if environ.get(var)})
+
+    def for_job(self, job_id):
+        """
+        Same models and caches, but working and scratch directories of the
+        job's own, so several jobs can run side by side on one host.
+        """
+        return replace(
+            self,
+            working_dir=self.working_dir / "jobs" / job_id,
+            scratch_dir=self.scratch_dir / job_id,
+            job_id=job_id,
+        )
+
+    @property
+    def outputs_dir(self):
+        return self.working_dir / "outputs"
+
+    @property
+    def final_dir(self):
+        return self.outputs_dir / "images_final"
+
+    @property
+    def enhanced_cache_dir(self):
+        return self.cache_dir / "enhanced"
+
+    @property
+    def extract_cache_dir(self):
+        return self.cache_dir / "extract"
+
+    def make_dirs(self):
+        for path in (self.outputs_dir, self.final_dir, self.scratch_dir):
+            path.mkdir(parents=True, exist_ok=True)
+        return self
+
+
+_CONFIG = None
+
+
+def get_config():
+    """
+    Process default, built from the environment on first use.
+    """
+    global _CONFIG
+    if _CONFIG is None:
+        _CONFIG = RuntimeConfig.from_env()
+    return _CONFIG
+
+
+def set_config(config):
+    global _CONFIG
+    _CONFIG = config
+    return config
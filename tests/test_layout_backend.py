@@ -0,0 +1,43 @@
+"""
+Backend choice of layout_generator.resolve_backend for layout_backend="auto".
+"""
+
+import warnings
+
+import pytest
+
+from layout_generator import layout_generator as lg
+from runtime_config import RuntimeConfig
+
+
+def config_with(tmp_path, *files):
+    for name in files:
+        (tmp_path / name).write_bytes(b"")
+    return RuntimeConfig(layout_model_dir=tmp_path, cache_dir=tmp_path / "cache")
+
+
+def test_npz_is_preferred(tmp_path):
+    config = config_with(tmp_path, lg.NPZ_FILE, lg.LAYOUT_MODEL_FILE)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert lg.resolve_backend(config) == "npz"
+
+
+def test_pickle_without_its_packages_falls_back_to_rules(tmp_path, monkeypatch):
+    monkeypatch.setattr(lg, "XGBOOST_MODULES", ("joblib", "no_such_module_xgb"))
+    config = config_with(tmp_path, lg.LAYOUT_MODEL_FILE)
+    with pytest.warns(RuntimeWarning, match="no_such_module_xgb"):
+        assert lg.resolve_backend(config) == "rules"
+
+
+def test_missing_model_dir_warns(tmp_path):
+    config = RuntimeConfig(layout_model_dir=tmp_path / "nowhere")
+    with pytest.warns(RuntimeWarning, match="nowhere"):
+        assert lg.resolve_backend(config) == "rules"
+
+
+def test_explicit_rules_does_not_warn(tmp_path):
+    config = RuntimeConfig(layout_model_dir=tmp_path / "nowhere", layout_backend="rules")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert lg.resolve_backend(config) == "rules"
@@ -0,0 +1,75 @@
+"""
+Hit/miss accounting and key matching of layout_generator.prediction_cache.
+"""
+
+import pandas as pd
+
+from input_for_layoutgenerator import FEATURE_COLUMNS
+from layout_generator.prediction_cache import COARSE_QUANTIZATION, PredictionCache, cached_predict
+
+
+def frame(rows):
+    return pd.DataFrame([{col: row.get(col, 0.0) for col in FEATURE_COLUMNS} for row in rows])
+
+
+class CountingModel:
+    def __init__(self):
+        self.rows = 0
+
+    def __call__(self, X, top_k):
+        self.rows += len(X)
+        return [[{"layout": f"text_{r.avg_text_len}", "confidence": 1.0}] for r in X.itertuples()]
+
+
+def test_in_batch_duplicates_are_hits():
+    cache, model = PredictionCache(), CountingModel()
+    preds = cached_predict(cache, frame([{"num_text_blocks": 1}] * 100), 1, model)
+
+    assert model.rows == 1
+    assert len(preds) == 100
+    assert cache.stats["misses"] == 1 and cache.stats["hits"] == 99
+
+    cached_predict(cache, frame([{"num_text_blocks": 1}] * 10), 1, model)
+    assert model.rows == 1
+    assert cache.stats["misses"] == 1 and cache.stats["hits"] == 109
+
+
+def test_exact_keys_by_default():
+    X = frame([{"avg_text_len": 10.0}, {"avg_text_len": 10.2}])
+    model = CountingModel()
+    preds = cached_predict(PredictionCache(), X, 1, model)
+    assert model.rows == 2
+    assert [p[0]["layout"] for p in preds] == ["text_10.0", "text_10.2"]
+
+
+def test_quantization_is_opt_in():
+    X = frame([{"avg_text_len": 10.0}, {"avg_text_len": 10.2}])
+    cache, model = PredictionCache(quantization=COARSE_QUANTIZATION), CountingModel()
+    preds = cached_predict(cache, X, 1, model)
+    assert model.rows == 1
+    assert [p[0]["layout"] for p in preds] == ["text_10.0", "text_10.0"]
+    assert cache.stats["misses"] == 1 and cache.stats["hits"] == 1
+
+
+def test_persist_cache_on_an_existing_predictor(tmp_path, monkeypatch):
+    from layout_generator import layout_generator as lg
+    from runtime_config import RuntimeConfig
+
+    monkeypatch.setattr(lg, "_PREDICTORS", {})
+    config = RuntimeConfig(cache_dir=tmp_path, layout_model_dir=tmp_path / "models")
+    X = frame([{"num_text_blocks": 2, "avg_text_len": 40.0}])
+
+    lg.predict_layouts(X, config=config, backend="rules")
+    path = lg.prediction_cache_path(config, "rules")
+    assert not path.exists()
+
+    lg.predict_layouts(X, config=config, backend="rules", persist_cache=True)
+    assert path.exists()
+    assert lg.get_predictor(config, "rules").cache.path == path
+
+    # a new worker starts from what the first one saved
+    monkeypatch.setattr(lg, "_PREDICTORS", {})
+    cache = lg.get_predictor(config, "rules", persist_cache=True).cache
+    assert len(cache) == 1
+    lg.predict_layouts(X, config=config, backend="rules")
+    assert cache.stats["misses"] == 0 and cache.stats["hits"] == 1
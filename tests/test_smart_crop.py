@@ -0,0 +1,116 @@
+"""
+Crop boxes of the reduced-resolution crop engine against the previous
+smart_crop, which thresholded the full-resolution mask and took np.where.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from image_processing.smart_crop import MAX_MASK_DRIFT, crop_box, foreground_bbox, smart_crop
+
+U2NET_SIZE = 320
+RATIOS = [16 / 9, 4 / 3, 1.0, 0.75, 2.5]
+
+
+def reference_crop_box(full_mask, target_ratio=16/9, padding=0.1):
+    # the pre-vectorization smart_crop, returning its box instead of the crop
+    h, w = full_mask.shape[:2]
+    _, mask = cv2.threshold(full_mask, 128, 255, cv2.THRESH_BINARY)
+    ys, xs = np.where(mask == 255)
+    if len(xs) == 0 or len(ys) == 0:
+        return None
+    x_min, x_max = xs.min(), xs.max()
+    y_min, y_max = ys.min(), ys.max()
+
+    bw = x_max - x_min
+    bh = y_max - y_min
+    x_min -= int(bw * padding)
+    x_max += int(bw * padding)
+    y_min -= int(bh * padding)
+    y_max += int(bh * padding)
+    x_min, y_min = max(0, x_min), max(0, y_min)
+    x_max, y_max = min(w, x_max), min(h, y_max)
+
+    box_w = x_max - x_min
+    box_h = y_max - y_min
+    if box_w / box_h > target_ratio:
+        diff = int(box_w / target_ratio) - box_h
+        y_min -= diff // 2
+        y_max += diff // 2
+    else:
+        diff = int(box_h * target_ratio) - box_w
+        x_min -= diff // 2
+        x_max += diff // 2
+    x_min, y_min = max(0, x_min), max(0, y_min)
+    x_max, y_max = min(w, x_max), min(h, y_max)
+    return int(x_min), int(y_min), int(x_max), int(y_max)
+
+
+def random_mask(rng, size=U2NET_SIZE):
+    """
+    A U-2-Net-like soft mask: a few blurred ellipses, scaled to 0..255.
+    """
+    mask = np.zeros((size, size), dtype=np.float32)
+    for _ in range(rng.integers(1, 4)):
+        cx, cy = rng.uniform(0.05 * size, 0.95 * size, 2)
+        ax, ay = rng.uniform(0.02 * size, 0.4 * size, 2)
+        cv2.ellipse(mask, (int(cx), int(cy)), (int(ax), int(ay)), rng.uniform(0, 180), 0, 360, 1.0, -1)
+    mask = cv2.GaussianBlur(mask, (0, 0), rng.uniform(0.5, 4))
+    return (mask / mask.max() * 255).astype(np.uint8)
+
+
+def test_foreground_bbox_matches_np_where():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        mask = cv2.resize(random_mask(rng), tuple(int(v) for v in rng.integers(50, 900, 2)))
+        ys, xs = np.where(mask > 128)
+        assert foreground_bbox(mask) == (xs.min(), xs.max(), ys.min(), ys.max())
+
+
+def test_foreground_bbox_empty_mask():
+    assert foreground_bbox(np.zeros((320, 320), dtype=np.uint8)) is None
+
+
+@pytest.mark.parametrize("target_ratio", RATIOS)
+def test_full_size_mask_gives_the_previous_crop_box(target_ratio):
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        w, h = (int(v) for v in rng.integers(200, 2000, 2))
+        full_mask = cv2.resize(random_mask(rng), (w, h), interpolation=cv2.INTER_LINEAR)
+        assert crop_box(w, h, full_mask, target_ratio) == reference_crop_box(full_mask, target_ratio)
+
+
+def test_raw_mask_crop_box_drift_is_bounded():
+    """
+    What process_image does now: the box from the 320x320 mask, against the
+    previous box from that mask resized to the image (as mask_batch writes it).
+    """
+    rng = np.random.default_rng(2)
+    worst = 0.0
+    for _ in range(400):
+        w, h = (int(v) for v in rng.integers(200, 4000, 2))
+        target_ratio = RATIOS[rng.integers(len(RATIOS))]
+        mask = random_mask(rng)
+        expected = reference_crop_box(cv2.resize(mask, (w, h), interpolation=cv2.INTER_LINEAR), target_ratio)
+        box = crop_box(w, h, mask, target_ratio)
+        assert (box is None) == (expected is None)
+        if box is None:
+            continue
+        mask_pixel = max(w, h) / U2NET_SIZE
+        worst = max(worst, max(abs(a - b) for a, b in zip(box, expected)) / mask_pixel)
+    assert worst <= MAX_MASK_DRIFT
+
+
+def test_smart_crop_accepts_arrays_and_paths(tmp_path):
+    rng = np.random.default_rng(3)
+    img = rng.integers(0, 256, (600, 900, 3), dtype=np.uint8)
+    mask = random_mask(rng)
+    cv2.imwrite(str(tmp_path / "img.png"), img)
+    cv2.imwrite(str(tmp_path / "mask.png"), mask)
+
+    from_arrays = smart_crop(img, mask, target_ratio=4 / 3)
+    from_paths = smart_crop(tmp_path / "img.png", tmp_path / "mask.png", target_ratio=4 / 3)
+    assert np.array_equal(from_arrays, from_paths)
+    x_min, y_min, x_max, y_max = crop_box(900, 600, mask, 4 / 3)
+    assert np.array_equal(from_arrays, img[y_min:y_max, x_min:x_max])
@@ -0,0 +1,93 @@
+"""
+Parity of the NumPy tree evaluator (layout_generator.tree_model) with the
+XGBoost model it was exported from.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+xgboost = pytest.importorskip("xgboost")
+pytest.importorskip("sklearn")
+from sklearn.preprocessing import LabelEncoder
+
+from input_for_layoutgenerator import FEATURE_COLUMNS
+from layout_generator.synthetic_data_generator import generate_dataset
+from layout_generator.tree_model import PARITY_TOLERANCE, TreeEnsemble, _parity_sample, export_xgboost
+
+
+@pytest.fixture(scope="module")
+def data():
+    df = generate_dataset(samples_per_class=200, seed=0)
+    encoder = LabelEncoder()
+    y = encoder.fit_transform(df["layout_class"])
+    return df[FEATURE_COLUMNS], y, encoder
+
+
+@pytest.fixture(scope="module")
+def model(data):
+    X, y, _ = data
+    clf = xgboost.XGBClassifier(n_estimators=30, max_depth=5, learning_rate=0.3, objective="multi:softprob")
+    return clf.fit(X, y)
+
+
+def max_diff(model, ensemble, X):
+    return float(np.abs(model.predict_proba(X) - ensemble.predict_proba(X)).max())
+
+
+def test_export_matches_xgboost(model, data, tmp_path):
+    X, _, encoder = data
+    path = tmp_path / "layout.npz"
+    ensemble = export_xgboost(model, path, encoder)
+    held_out = generate_dataset(samples_per_class=50, seed=1)[FEATURE_COLUMNS]
+
+    assert max_diff(model, ensemble, held_out) <= PARITY_TOLERANCE
+    loaded = TreeEnsemble.load(path)
+    assert max_diff(model, loaded, held_out) <= PARITY_TOLERANCE
+    assert list(loaded.classes_) == list(encoder.classes_)
+    assert loaded.feature_names == FEATURE_COLUMNS
+
+
+def test_missing_values_follow_default_direction(data, tmp_path):
+    X, y, _ = data
+    # gaps in training give splits whose default branch is left, not just right
+    X = X.mask(np.random.default_rng(3).random(X.shape) < 0.2)
+    clf = xgboost.XGBClassifier(n_estimators=30, max_depth=5, learning_rate=0.3, objective="multi:softprob")
+    clf.fit(X, y)
+
+    ensemble = export_xgboost(clf, tmp_path / "layout.npz")
+    inner = ensemble.feature >= 0
+    assert (ensemble.missing[inner] == ensemble.left[inner]).any()
+    sample = pd.DataFrame(_parity_sample(ensemble, n=3000, seed=5), columns=ensemble.feature_names)
+    assert max_diff(clf, ensemble, sample) <= PARITY_TOLERANCE
+    assert max_diff(clf, ensemble, X) <= PARITY_TOLERANCE
+
+
+def test_early_stopping_uses_best_iteration(data, tmp_path):
+    X, y, _ = data
+    clf = xgboost.XGBClassifier(n_estimators=200, max_depth=4, learning_rate=0.5,
+                                objective="multi:softprob", early_stopping_rounds=3)
+    # shuffled labels make the eval loss turn up after a few rounds
+    noisy = np.random.default_rng(0).permutation(y[::5])
+    clf.fit(X, y, eval_set=[(X.iloc[::5], noisy)], verbose=False)
+    assert clf.best_iteration < 199
+
+    ensemble = export_xgboost(clf, tmp_path / "layout.npz")
+    assert max_diff(clf, ensemble, X) <= PARITY_TOLERANCE
+
+
+def test_export_refuses_a_model_that_does_not_match(model, tmp_path):
+    class Shifted:
+        # predict_proba off by more than the tolerance
+        best_iteration = None
+
+        def get_booster(self):
+            return model.get_booster()
+
+        def predict_proba(self, X):
+            return model.predict_proba(X) + 10 * PARITY_TOLERANCE
+
+    path = tmp_path / "layout.npz"
+    with pytest.raises(ValueError):
+        export_xgboost(Shifted(), path)
+    assert not path.exists()